@@ -3,8 +3,10 @@ from __future__ import annotations
 
 import logging
 import shutil
-from datetime import timedelta
+import time
+from datetime import date, timedelta
 from pathlib import Path
+from typing import Any
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
@@ -13,8 +15,15 @@ from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 from homeassistant.helpers import device_registry as dr
 
-from .const import DOMAIN, CONF_EXCLUDED_SUBJECTS, CONF_CLASS_NAME, CONF_SELECTED_COURSES, CONF_SERVER, DEFAULT_BASE_URL, DOWNLOAD_SERVERS, CONF_DEMO_MODE
-from .api_new import Stundenplan24API
+from .const import DOMAIN, CONF_EXCLUDED_SUBJECTS, CONF_CLASS_NAME, CONF_SELECTED_COURSES, CONF_SERVER, DEFAULT_BASE_URL, DOWNLOAD_SERVERS, CONF_DEMO_MODE, DATA_XML_CACHE, DEFAULT_UPDATE_INTERVAL, CONF_MAX_PAYLOAD_SIZE, DEFAULT_MAX_PAYLOAD_SIZE, CONF_PARSE_OFFLOAD_SIZE, DEFAULT_PARSE_OFFLOAD_SIZE, CONF_PARSE_PROCESSES, DEFAULT_PARSE_PROCESSES, CONF_FETCH_CONCURRENCY, DEFAULT_FETCH_CONCURRENCY, MAX_FETCH_CONCURRENCY, CONF_PREFETCH_WEEKS, DEFAULT_PREFETCH_WEEKS, LOOP_LAG_WARNING, SERVER_PROBE_INTERVAL, XML_CACHE_DIR
+from .api_new import AuthenticationError, CircuitOpenError, PlanNotPublishedError, Stundenplan24API
+from .metrics import LoopLagMonitor
+from .models import PeriodGrid
+from .parse_pool import async_acquire_parse_pool, async_release_parse_pool
+from .prefetch import PrefetchScheduler
+from .snapshot import Snapshot, SnapshotStore
+from .transport import async_get_transport
+from .xml_cache import PlanXmlCache
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -143,6 +152,14 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     except Exception as _repair_err:
         _LOGGER.debug("VpMobile24: repairs module not available: %s", _repair_err)
 
+    # Raw plan XML survives restarts so the first refresh can revalidate
+    # instead of downloading every prefetched day again (shared by all entries)
+    xml_cache = hass.data[DOMAIN].get(DATA_XML_CACHE)
+    if xml_cache is None:
+        xml_cache = PlanXmlCache(Path(hass.config.path(".storage", XML_CACHE_DIR)))
+        hass.data[DOMAIN][DATA_XML_CACHE] = xml_cache
+        await hass.async_add_executor_job(xml_cache.evict_expired)
+
     server_key = entry.options.get(CONF_SERVER) or entry.data.get(CONF_SERVER, "www")
     base_url = DOWNLOAD_SERVERS.get(server_key, DEFAULT_BASE_URL)
     api = Stundenplan24API(
@@ -150,6 +167,18 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         username=entry.data["username"],
         password=entry.data["password"],
         base_url=base_url,
+        xml_cache=xml_cache,
+        xml_cache_max_age=DEFAULT_UPDATE_INTERVAL * 60,
+        transport=async_get_transport(hass),
+        max_payload_size=entry.options.get(CONF_MAX_PAYLOAD_SIZE, DEFAULT_MAX_PAYLOAD_SIZE) * 1024 * 1024,
+        parse_offload_size=entry.options.get(CONF_PARSE_OFFLOAD_SIZE, DEFAULT_PARSE_OFFLOAD_SIZE) * 1024,
+        parse_pool=async_acquire_parse_pool(
+            hass, entry.entry_id, entry.options.get(CONF_PARSE_PROCESSES, DEFAULT_PARSE_PROCESSES)
+        ),
+        max_concurrent_fetches=min(
+            entry.options.get(CONF_FETCH_CONCURRENCY, DEFAULT_FETCH_CONCURRENCY),
+            MAX_FETCH_CONCURRENCY,
+        ),
     )
 
     coordinator = VpMobile24DataUpdateCoordinator(
@@ -161,8 +190,17 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         entry_id=entry.entry_id,
         teacher_short=entry.data.get("teacher_short"),
         is_demo=entry.data.get(CONF_DEMO_MODE, False),
+        prefetch_weeks=entry.options.get(CONF_PREFETCH_WEEKS, DEFAULT_PREFETCH_WEEKS),
     )
-    await coordinator.async_config_entry_first_refresh()
+    entry.async_on_unload(coordinator.prefetch.cancel)
+    if await coordinator.async_restore_snapshot():
+        # Entities start with the data of the last run; the first refresh
+        # revalidates it without holding up the setup
+        entry.async_create_background_task(
+            hass, coordinator.async_refresh(), f"{DOMAIN}_first_refresh_{entry.entry_id}"
+        )
+    else:
+        await coordinator.async_config_entry_first_refresh()
 
     hass.data[DOMAIN][entry.entry_id] = coordinator
 
@@ -212,6 +250,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             old_class = coord.class_name  # save before overwriting
             coord.class_name = new_class
             coord._week_data_cache = {}
+            coord._stale_dates = set()
             coord._current_week_monday = None
             coord._week_data = None
             _LOGGER.info("VpMobile24: class changed to %s, cache cleared", new_class)
@@ -238,6 +277,20 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
         coord.excluded_subjects = new_excluded
         coord.selected_courses  = new_selected
+        coord.api.max_payload_size = (
+            entry.options.get(CONF_MAX_PAYLOAD_SIZE, DEFAULT_MAX_PAYLOAD_SIZE) * 1024 * 1024
+        )
+        coord.api.parse_offload_size = (
+            entry.options.get(CONF_PARSE_OFFLOAD_SIZE, DEFAULT_PARSE_OFFLOAD_SIZE) * 1024
+        )
+        coord.api.parse_pool = async_acquire_parse_pool(
+            hass, entry.entry_id, entry.options.get(CONF_PARSE_PROCESSES, DEFAULT_PARSE_PROCESSES)
+        )
+        coord.api.max_concurrent_fetches = min(
+            entry.options.get(CONF_FETCH_CONCURRENCY, DEFAULT_FETCH_CONCURRENCY),
+            MAX_FETCH_CONCURRENCY,
+        )
+        coord.prefetch_weeks = entry.options.get(CONF_PREFETCH_WEEKS, DEFAULT_PREFETCH_WEEKS)
         # If state_code changed, refresh holiday data immediately
         await coord._async_update_holidays()
         await coord.async_request_refresh()
@@ -264,11 +317,20 @@ async def async_setup(hass: HomeAssistant, config: dict) -> bool:
     return True
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Delete the stored snapshot of a removed config entry."""
+    await SnapshotStore(hass, entry.entry_id).async_remove()
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
         coordinator = hass.data[DOMAIN].pop(entry.entry_id)
         await coordinator.api.async_close()
+        async_release_parse_pool(hass, entry.entry_id)
+
+        from homeassistant.helpers.issue_registry import async_delete_issue
+        async_delete_issue(hass, DOMAIN, f"slow_server_{entry.entry_id}")
 
     return unload_ok
 
@@ -276,7 +338,7 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 class VpMobile24DataUpdateCoordinator(DataUpdateCoordinator):
     """Class to manage fetching data from the API."""
 
-    def __init__(self, hass: HomeAssistant, api: Stundenplan24API, class_name: str | None = None, excluded_subjects: list[str] | None = None, selected_courses: list[str] | None = None, entry_id: str | None = None, teacher_short: str | None = None, is_demo: bool = False) -> None:
+    def __init__(self, hass: HomeAssistant, api: Stundenplan24API, class_name: str | None = None, excluded_subjects: list[str] | None = None, selected_courses: list[str] | None = None, entry_id: str | None = None, teacher_short: str | None = None, is_demo: bool = False, prefetch_weeks: int = DEFAULT_PREFETCH_WEEKS) -> None:
         """Initialize."""
         self.api = api
         self.class_name = class_name
@@ -289,12 +351,47 @@ class VpMobile24DataUpdateCoordinator(DataUpdateCoordinator):
         self._week_data_cache = {}
         self._current_week_monday = None
         self._holiday_data: list = []
+        self._last_server_probe: float | None = None  # monotonic
+        # Duration and event loop lag of the last update (see metrics.py)
+        self.update_stats: dict[str, Any] = {}
+        # Milliseconds from setup until a restored snapshot, today's data and
+        # the whole window were published, and the age of the snapshot
+        self.startup_stats: dict[str, Any] = {}
+        self._created = time.monotonic()
+        # The first refresh only fetches today, see _async_fetch_data
+        self._first_refresh = True
+        # Last published data, restored on the next start (see snapshot.py).
+        # Stale days (restored, or kept when a new week began) stay visible
+        # until they have been fetched again in the background
+        self._snapshot_store = (
+            SnapshotStore(hass, entry_id) if entry_id and not is_demo else None
+        )
+        self._stale_dates: set[str] = set()
+        # Weeks after the current one that are loaded in the background
+        self.prefetch_weeks = prefetch_weeks
         super().__init__(
             hass,
             _LOGGER,
             name=DOMAIN,
             update_interval=timedelta(minutes=15),
         )
+        # Created during the entry's setup, so self.config_entry is that entry;
+        # background work is tied to it and cancelled when it is unloaded
+        self.prefetch = PrefetchScheduler(
+            hass,
+            self.config_entry,
+            f"{DOMAIN}_prefetch_{entry_id}",
+            self._async_prefetch_date,
+            self._prefetch_done,
+        )
+
+    @property
+    def period_grid(self) -> PeriodGrid:
+        """Period times of the school (from the plan files, or of the demo data)."""
+        if self.is_demo:
+            from .demo import DEMO_PERIOD_GRID
+            return DEMO_PERIOD_GRID
+        return self.api.period_grid
 
     def _resolve_original_subject(self, base_schedule, weekday_index, period, course):
         """Return the original subject for a cancelled slot, or '' if ambiguous."""
@@ -329,7 +426,36 @@ class VpMobile24DataUpdateCoordinator(DataUpdateCoordinator):
         return False
 
     async def _async_update_data(self):
-        """Update data via library."""
+        """Update data via library, measuring how long the event loop stalls."""
+        lag = LoopLagMonitor()
+        lag.start()
+        # Background downloads wait until this update has been published
+        self.prefetch.pause()
+        try:
+            return await self._async_fetch_data()
+        finally:
+            self.prefetch.resume()
+            lag.stop()
+            self.update_stats = lag.as_dict()
+            _LOGGER.debug(
+                "VpMobile24: update took %.2f s, event loop blocked %.0f ms in total, "
+                "%.0f ms at most",
+                lag.duration, lag.total_lag * 1000, lag.max_lag * 1000,
+            )
+            if lag.max_lag >= LOOP_LAG_WARNING:
+                _LOGGER.warning(
+                    "VpMobile24: the event loop was blocked for %.2f s during an update "
+                    "(not necessarily by this integration)",
+                    lag.max_lag,
+                )
+            if self._first_refresh:
+                self._first_refresh = False
+                self._record_startup("first_refresh_ms")
+                if not self.prefetch.pending:
+                    self._startup_complete()
+
+    async def _async_fetch_data(self):
+        """Load today's data and the week around it."""
         try:
             _LOGGER.debug("Starting data update...")
 
@@ -355,6 +481,8 @@ class VpMobile24DataUpdateCoordinator(DataUpdateCoordinator):
                         self._week_data_cache[d]["lessons"].append(lesson)
                 return data
 
+            self._async_schedule_server_probe()
+
             from datetime import date
             today = date.today()
             today_str = today.isoformat()
@@ -363,10 +491,7 @@ class VpMobile24DataUpdateCoordinator(DataUpdateCoordinator):
             monday_this_week = today - timedelta(days=days_since_monday)
             monday_str = monday_this_week.isoformat()
 
-            if self._current_week_monday != monday_str:
-                _LOGGER.info(f"New week detected (Monday: {monday_str}), clearing cache")
-                self._week_data_cache = {}
-                self._current_week_monday = monday_str
+            self._roll_window(monday_this_week)
 
             week_dates = []
             for i in range(5):
@@ -384,63 +509,69 @@ class VpMobile24DataUpdateCoordinator(DataUpdateCoordinator):
             cached_dates = set(self._week_data_cache.keys())
             _LOGGER.debug(f"Cached dates: {cached_dates}")
 
-            dates_to_load = [today]
-            for date_str in week_dates:
-                if date_str not in cached_dates and date_str != today_str:
-                    try:
-                        dates_to_load.append(date.fromisoformat(date_str))
-                    except ValueError:
-                        continue
-
-            _LOGGER.debug(f"Loading dates: {[d.isoformat() for d in dates_to_load]}")
+            # Today is always refreshed, the other days of this week only
+            # while they are not cached; today is fetched first.
+            this_friday = monday_this_week + timedelta(days=4)
+            skip = {
+                date.fromisoformat(date_str)
+                for date_str in cached_dates
+                if date_str != today_str and date_str not in self._stale_dates
+            }
+            # ── Fast first refresh: setup only waits for today and for the
+            # days the XML cache answers without a request; the rest of the
+            # week is left to the prefetch scheduler. Stale days are shown
+            # as cached and revalidated the same way in every refresh ──
+            candidates = [
+                day
+                for day in (monday_this_week + timedelta(days=i) for i in range(5))
+                if day != today and (
+                    day.isoformat() in self._stale_dates
+                    or (self._first_refresh and day.isoformat() not in cached_dates)
+                )
+            ]
+            deferred = []
+            if candidates:
+                warm = await self.api.async_get_warm_dates(candidates)
+                deferred = [day for day in candidates if day not in warm]
+                skip.update(deferred)
+            fetched = await self.api.async_get_schedule_range(
+                monday_this_week,
+                this_friday,
+                self.class_name,
+                self.teacher_short,
+                skip=skip,
+                weekdays_only=True,
+            )
 
-            for target_date in dates_to_load:
-                try:
+            for target_date, day_data in fetched.results.items():
+                self._cache_day(target_date, day_data)
+            if self._first_refresh:
+                self.startup_stats["first_refresh_days"] = len(fetched.results)
+
+            circuit_open_logged = False
+            for target_date, ex in fetched.errors.items():
+                if isinstance(ex, PlanNotPublishedError):
+                    _LOGGER.debug("No schedule for %s (404 - weekend/holiday)", target_date)
+                elif isinstance(ex, AuthenticationError):
+                    _LOGGER.warning("VpMobile24: credentials rejected for %s: %s", target_date, ex)
+                elif isinstance(ex, CircuitOpenError):
+                    # Every server is known to be down — the remaining dates were not tried
+                    if not circuit_open_logged:
+                        _LOGGER.warning("VpMobile24: %s, skipping remaining dates", ex)
+                        circuit_open_logged = True
+                else:
+                    _LOGGER.warning("Could not fetch schedule for %s: %s", target_date, ex)
+
+            # ── Feature 1: Pre-fetch the following weeks in the background ──
+            # Starts once this update has been published (see _async_update_data)
+            prefetch_dates = deferred
+            for week in range(1, self.prefetch_weeks + 1):
+                for i in range(5):
+                    target_date = monday_this_week + timedelta(weeks=week, days=i)
                     date_str = target_date.isoformat()
-                    _LOGGER.debug(f"Fetching schedule for {date_str}")
-                    day_data = await self.api.async_get_schedule(target_date, self.class_name, self.teacher_short)
-                    self._week_data_cache[date_str] = {
-                        "lessons": day_data.get("lessons", []),
-                        "changes": day_data.get("changes", []),
-                        "additional_info": day_data.get("additional_info", []),
-                        "timestamp": day_data.get("timestamp", "")
-                    }
-                    _LOGGER.debug(f"Cached {date_str}: {len(day_data.get('lessons', []))} lessons, {len(day_data.get('additional_info', []))} additional_info")
-                except Exception as ex:
-                    ex_str = str(ex)
-                    if "404" in ex_str:
-                        _LOGGER.debug("No schedule for %s (404 - weekend/holiday)", target_date)
-                    else:
-                        _LOGGER.warning("Could not fetch schedule for %s: %s", target_date, ex)
-                    continue
-
-            # ── Feature 1: Pre-fetch next week + next_next week ──────────────
-            next_monday = monday_this_week + timedelta(weeks=1)
-            next_next_monday = monday_this_week + timedelta(weeks=2)
-            prefetch_dates = []
-            for i in range(5):
-                d1 = (next_monday + timedelta(days=i)).isoformat()
-                d2 = (next_next_monday + timedelta(days=i)).isoformat()
-                if d1 not in self._week_data_cache:
-                    prefetch_dates.append(d1)
-                if d2 not in self._week_data_cache:
-                    prefetch_dates.append(d2)
-            for date_str in prefetch_dates:
-                try:
-                    target = date.fromisoformat(date_str)
-                    day_data = await self.api.async_get_schedule(target, self.class_name, self.teacher_short)
-                    self._week_data_cache[date_str] = {
-                        "lessons": day_data.get("lessons", []),
-                        "changes": day_data.get("changes", []),
-                        "additional_info": day_data.get("additional_info", []),
-                        "timestamp": day_data.get("timestamp", "")
-                    }
-                    _LOGGER.debug("Pre-fetched %s", date_str)
-                except Exception as ex:
-                    ex_str = str(ex)
-                    if "404" not in ex_str:
-                        _LOGGER.debug("Could not pre-fetch %s: %s", date_str, ex)
-                    continue
+                    if date_str not in self._week_data_cache or date_str in self._stale_dates:
+                        prefetch_dates.append(target_date)
+            self.prefetch.schedule(prefetch_dates)
 
             # ----------------------------------------------------------------
             # Build base_schedule: normal timetable without substitutions.
@@ -541,10 +672,9 @@ class VpMobile24DataUpdateCoordinator(DataUpdateCoordinator):
                             elif lesson_course and lesson_course not in student_courses and lesson_course in self.excluded_subjects:
                                 continue
 
-                            lesson_copy = lesson.copy()
-                            lesson_copy["date"] = date_str
-                            lesson_copy["day_name"] = day_name
-                            all_lessons.append(lesson_copy)
+                            all_lessons.append(
+                                lesson.replace(date=date_str, day_name=day_name)
+                            )
 
                         for change in cached_day.get("changes", []):
                             subject = change.get("subject", "")
@@ -569,10 +699,9 @@ class VpMobile24DataUpdateCoordinator(DataUpdateCoordinator):
                             elif subject in self.excluded_subjects:
                                 continue
 
-                            change_copy = change.copy()
-                            change_copy["date"] = date_str
-                            change_copy["day_name"] = day_name
-                            all_changes.append(change_copy)
+                            all_changes.append(
+                                change.replace(date=date_str, day_name=day_name)
+                            )
 
                         for info in cached_day.get("additional_info", []):
                             info_text = info.get("text", "") if isinstance(info, dict) else str(info)
@@ -626,6 +755,8 @@ class VpMobile24DataUpdateCoordinator(DataUpdateCoordinator):
             }
 
             _LOGGER.debug("Data update completed successfully")
+            if self._snapshot_store is not None:
+                self._snapshot_store.async_delay_save(lambda: self._snapshot(today_data))
 
             # ── Fetch school holidays from openholidaysapi.org ──────────────
             _LOGGER.warning("VpMobile24: calling _async_update_holidays")
@@ -647,6 +778,212 @@ class VpMobile24DataUpdateCoordinator(DataUpdateCoordinator):
                 "week_changes": []
             }
 
+    def _cache_day(self, target_date, day_data: dict[str, Any]) -> None:
+        """Store the schedule of one date in the week cache."""
+        date_str = target_date.isoformat()
+        self._stale_dates.discard(date_str)
+        self._week_data_cache[date_str] = {
+            "lessons": day_data.get("lessons", []),
+            "changes": day_data.get("changes", []),
+            "additional_info": day_data.get("additional_info", []),
+            "timestamp": day_data.get("timestamp", "")
+        }
+        _LOGGER.debug(f"Cached {date_str}: {len(day_data.get('lessons', []))} lessons, {len(day_data.get('additional_info', []))} additional_info")
+
+    async def _async_prefetch_date(self, target_date) -> None:
+        """Fetch one date for the prefetch scheduler and cache it."""
+        day_data = await self.api.async_get_schedule(
+            target_date, self.class_name, self.teacher_short
+        )
+        self._cache_day(target_date, day_data)
+
+    def _snapshot_settings(self) -> list[Any]:
+        """Return the settings the published data depends on."""
+        return [
+            self.class_name,
+            self.teacher_short,
+            sorted(self.excluded_subjects),
+            sorted(self.selected_courses),
+        ]
+
+    def _snapshot(self, data: dict[str, Any]) -> Snapshot:
+        """Return published ``data`` and the day cache for the snapshot store."""
+        return Snapshot(
+            self._snapshot_settings(),
+            self._current_week_monday,
+            {
+                key: data.get(key, default)
+                for key, default in (
+                    ("week_lessons", []),
+                    ("week_changes", []),
+                    ("additional_info", []),
+                    ("timestamp", ""),
+                )
+            },
+            dict(self._week_data_cache),
+            self.period_grid,
+        )
+
+    async def async_restore_snapshot(self) -> bool:
+        """Load the data stored by the last run.
+
+        The day cache is restored if the snapshot was taken with the current
+        settings; the week is only published again (and True returned) if it
+        is still the current one. Restored days are revalidated by the next
+        refresh.
+        """
+        if self._snapshot_store is None:
+            return False
+        snapshot = await self._snapshot_store.async_load()
+        if snapshot is None:
+            return False
+        # Lessons without times of their own take them from the grid
+        self.api.restore_period_grid(snapshot.period_grid)
+        if snapshot.settings != self._snapshot_settings():
+            return False
+
+        self._week_data_cache = snapshot.days
+        self._stale_dates = set(snapshot.days)
+        self._current_week_monday = snapshot.monday
+        self.startup_stats["snapshot_age_s"] = round(snapshot.age)
+
+        today = date.today()
+        if snapshot.monday != (today - timedelta(days=today.weekday())).isoformat():
+            _LOGGER.debug("VpMobile24: snapshot is from another week, not publishing it")
+            return False
+
+        today_str = today.isoformat()
+        week_lessons = snapshot.week.get("week_lessons", [])
+        week_changes = snapshot.week.get("week_changes", [])
+        self.async_set_updated_data({
+            "lessons": [l for l in week_lessons if l.get("date") == today_str],
+            "changes": [c for c in week_changes if c.get("date") == today_str],
+            "additional_info": snapshot.week.get("additional_info", []),
+            "date": today_str,
+            "timestamp": snapshot.week.get("timestamp", ""),
+            "week_lessons": week_lessons,
+            "week_changes": week_changes,
+        })
+        self._record_startup("snapshot_ms")
+        _LOGGER.info(
+            "VpMobile24: %s restored data of %d days from %d minutes ago",
+            self.teacher_short or self.class_name,
+            len(snapshot.days),
+            snapshot.age // 60,
+        )
+        return True
+
+    def _roll_window(self, monday: date) -> None:
+        """Keep the day cache to this week and the prefetch horizon.
+
+        Days before ``monday`` or after the last prefetched Friday are
+        dropped. When a new week begins, the days kept from the previous
+        window (prefetched up to a week ago) are marked stale, so they are
+        revalidated in the background instead of downloaded before the
+        update is published.
+        """
+        first = monday.isoformat()
+        last = (monday + timedelta(weeks=self.prefetch_weeks, days=4)).isoformat()
+        dropped = [
+            date_str for date_str in self._week_data_cache
+            if not first <= date_str <= last
+        ]
+        for date_str in dropped:
+            del self._week_data_cache[date_str]
+            self._stale_dates.discard(date_str)
+        if self._current_week_monday != first:
+            _LOGGER.info(
+                "VpMobile24: new week (Monday: %s), dropped %d cached days, "
+                "keeping %d to revalidate",
+                first, len(dropped), len(self._week_data_cache),
+            )
+            self._stale_dates.update(self._week_data_cache)
+            self._current_week_monday = first
+
+    def _prefetch_done(self, fetched: list[date]) -> None:
+        """Publish the dates the prefetch scheduler has loaded."""
+        if "complete_ms" not in self.startup_stats:
+            self._startup_complete()
+        monday = self._current_week_monday
+        if monday is not None and any(
+            0 <= (day - date.fromisoformat(monday)).days < 5 for day in fetched
+        ):
+            # Days of the current week are part of the published data
+            self.config_entry.async_create_task(self.hass, self.async_request_refresh())
+        elif fetched:
+            self.async_update_listeners()
+
+    def _record_startup(self, key: str) -> None:
+        """Store the milliseconds since the coordinator was created."""
+        self.startup_stats[key] = round((time.monotonic() - self._created) * 1000)
+
+    def _startup_complete(self) -> None:
+        """Record and log that the whole window has been loaded once."""
+        self._record_startup("complete_ms")
+        _LOGGER.info(
+            "VpMobile24: %s started, today published after %s ms, %d days after %s ms",
+            self.teacher_short or self.class_name,
+            self.startup_stats.get("first_refresh_ms"),
+            len(self._week_data_cache),
+            self.startup_stats["complete_ms"],
+        )
+
+    def _async_schedule_server_probe(self) -> None:
+        """Probe the download mirrors in the background every SERVER_PROBE_INTERVAL."""
+        now = time.monotonic()
+        if (
+            self._last_server_probe is not None
+            and now - self._last_server_probe < SERVER_PROBE_INTERVAL * 60
+        ):
+            return
+        self._last_server_probe = now
+        self.config_entry.async_create_background_task(
+            self.hass, self._async_probe_servers(), f"{DOMAIN}_probe_servers_{self._entry_id}"
+        )
+
+    async def _async_probe_servers(self) -> None:
+        """Re-rank the mirrors and raise a repair issue if a faster one is ignored."""
+        from homeassistant.helpers.issue_registry import (
+            IssueSeverity,
+            async_create_issue,
+            async_delete_issue,
+        )
+
+        try:
+            await self.api.async_probe_servers()
+        except Exception as err:
+            _LOGGER.debug("VpMobile24: mirror probe failed: %s", err)
+            return
+
+        issue_id = f"slow_server_{self._entry_id}"
+        slower = self.api.servers.consistently_slower
+        if slower is None:
+            async_delete_issue(self.hass, DOMAIN, issue_id)
+            return
+
+        server_names = {url: name for name, url in DOWNLOAD_SERVERS.items()}
+        alternative, configured_latency, alternative_latency = slower
+        _LOGGER.info(
+            "VpMobile24: %s answers faster than the configured server %s",
+            alternative, self.api.servers.configured,
+        )
+        async_create_issue(
+            self.hass,
+            DOMAIN,
+            issue_id,
+            is_fixable=False,
+            severity=IssueSeverity.WARNING,
+            translation_key="slow_server",
+            translation_placeholders={
+                "configured": server_names.get(
+                    self.api.servers.configured, self.api.servers.configured
+                ),
+                "configured_ms": str(round(configured_latency * 1000)),
+                "alternative": server_names.get(alternative, alternative),
+                "alternative_ms": str(round(alternative_latency * 1000)),
+            },
+        )
+
     async def _async_update_holidays(self) -> None:
         """Fetch school holidays from ferien-api.de for the configured state."""
         try:
@@ -676,26 +1013,25 @@ class VpMobile24DataUpdateCoordinator(DataUpdateCoordinator):
             year = today.year
 
             all_holidays = []
-            import aiohttp
-            async with aiohttp.ClientSession() as session:
-                for y in [year, year + 1]:
-                    url = f"https://ferien-api.de/api/v1/holidays/{state_code}/{y}"
-                    try:
-                        async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as resp:
-                            if resp.status == 200:
-                                data = await resp.json()
-                                if isinstance(data, list):
-                                    for h in data:
-                                        all_holidays.append({
-                                            "startDate": h.get("start", ""),
-                                            "endDate": h.get("end", ""),
-                                            "name": [{"language": "DE", "text": h.get("name", "Ferien").title()}],
-                                        })
-                                    _LOGGER.debug("VpMobile24: loaded %d entries for %s/%s", len(data), state_code, y)
-                            else:
-                                _LOGGER.warning("VpMobile24: ferien-api.de returned %s for %s/%s", resp.status, state_code, y)
-                    except Exception as err:
-                        _LOGGER.warning("VpMobile24: could not fetch holidays for %s/%s: %s", state_code, y, err)
+            transport = self.api.transport
+            for y in [year, year + 1]:
+                url = f"https://ferien-api.de/api/v1/holidays/{state_code}/{y}"
+                try:
+                    async with transport.get(url, timeout=10) as resp:
+                        if resp.status == 200:
+                            data = await resp.json()
+                            if isinstance(data, list):
+                                for h in data:
+                                    all_holidays.append({
+                                        "startDate": h.get("start", ""),
+                                        "endDate": h.get("end", ""),
+                                        "name": [{"language": "DE", "text": h.get("name", "Ferien").title()}],
+                                    })
+                                _LOGGER.debug("VpMobile24: loaded %d entries for %s/%s", len(data), state_code, y)
+                        else:
+                            _LOGGER.warning("VpMobile24: ferien-api.de returned %s for %s/%s", resp.status, state_code, y)
+                except Exception as err:
+                    _LOGGER.warning("VpMobile24: could not fetch holidays for %s/%s: %s", state_code, y, err)
 
             if all_holidays:
                 self._holiday_data = all_holidays
@@ -2,16 +2,228 @@
 from __future__ import annotations
 
 import asyncio
+import functools
 import logging
-from datetime import datetime, date, timedelta
-from typing import Any
-import xml.etree.ElementTree as ET
+import random
+import time
+import weakref
+from collections.abc import Awaitable, Callable, Container, Iterable
+from datetime import date, timedelta
+from typing import Any, Protocol, TypeVar
 
 import aiohttp
-from aiohttp import BasicAuth
+
+from .const import (
+    DEFAULT_FETCH_CONCURRENCY,
+    DEFAULT_MAX_PAYLOAD_SIZE,
+    DEFAULT_PARSE_OFFLOAD_SIZE,
+    DOWNLOAD_SERVERS,
+)
+from .models import (
+    CourseCatalog,
+    Lesson,
+    PeriodGrid,
+    SchoolPlan,
+    parse_minutes,
+    parse_period,
+)
+from .parse_pool import ParsePool
+from .servers import ServerPool, ServerStats
+from .transport import VpMobile24Transport, basic_auth_header, get_default_transport
+from .xml_backend import BACKEND, Element, ParseError, compile_path, fromstring, pull_parser
+from .xml_cache import TIMESTAMP_PREFIX_SIZE, PlanXmlCache, plan_timestamp
 
 _LOGGER = logging.getLogger(__name__)
 
+_T = TypeVar("_T")
+_T_co = TypeVar("_T_co", covariant=True)
+
+# How long a "plan not published" answer is trusted, by distance of the plan
+# date from today. Near days are rechecked often because tomorrow's plan is
+# usually uploaded during the afternoon; past days never appear later.
+_NOT_PUBLISHED_TTL_PAST = 24 * 3600
+_NOT_PUBLISHED_TTL_WEEKEND = 12 * 3600
+_NOT_PUBLISHED_TTL_NEAR = 30 * 60     # today and tomorrow
+_NOT_PUBLISHED_TTL_WEEK = 2 * 3600    # up to a week ahead
+_NOT_PUBLISHED_TTL_FAR = 6 * 3600
+
+# Timeout of a single mirror probe request
+_PROBE_TIMEOUT = 5
+
+# The course catalog is rebuilt after this many seconds; plan files for it
+# are fetched this many dates at a time
+_COURSE_CATALOG_TTL = 3600
+_COURSE_CATALOG_BATCH = 2
+
+# Retries of a failed download: exponential backoff with full jitter
+_RETRY_ATTEMPTS = 3
+_RETRY_BASE_DELAY = 0.5   # seconds
+_RETRY_MAX_DELAY = 5.0
+
+# Response bodies are read (and fed to streaming parsers) in chunks of this size
+STREAM_CHUNK_SIZE = 16 * 1024
+
+
+class VpMobile24Error(Exception):
+    """Base class for errors raised by the stundenplan24 client."""
+
+
+class PlanNotPublishedError(VpMobile24Error):
+    """No plan exists for the requested file (HTTP 404 — weekend, holiday or not yet uploaded)."""
+
+
+class AuthenticationError(VpMobile24Error):
+    """The server rejected the credentials (HTTP 401/403)."""
+
+
+class TransientError(VpMobile24Error):
+    """Timeout, connection problem or unexpected server answer — retry later."""
+
+
+class CircuitOpenError(TransientError):
+    """Every server's circuit breaker is open — no request was sent."""
+
+
+class PayloadTooLargeError(VpMobile24Error):
+    """The server sent (or announced) more data than ``max_payload_size`` allows."""
+
+
+# Downloads currently running, shared by all API instances so that the config
+# flow, options flow and coordinator never fetch the same file twice at once.
+_IN_FLIGHT: dict[tuple, asyncio.Task] = {}
+
+
+async def _async_single_flight(key: tuple, factory: Callable[[], Awaitable[_T]]) -> _T:
+    """Run ``factory()`` once for all concurrent callers with the same key.
+
+    The first caller starts the work as a task; everyone arriving while it is
+    still running awaits that same task. A caller being cancelled does not
+    cancel the shared work for the others.
+    """
+    task = _IN_FLIGHT.get(key)
+    if task is None:
+        task = asyncio.ensure_future(factory())
+        _IN_FLIGHT[key] = task
+
+        def _done(finished: asyncio.Task) -> None:
+            if _IN_FLIGHT.get(key) is finished:
+                del _IN_FLIGHT[key]
+            if not finished.cancelled():
+                finished.exception()  # mark as retrieved if every caller left
+
+        task.add_done_callback(_done)
+    else:
+        _LOGGER.debug("Joining in-flight request for %s", key[0])
+    return await asyncio.shield(task)
+
+
+# <Std> child tag → lesson field (keyword argument of Lesson)
+_LESSON_FIELDS: dict[str, str] = {
+    "St": "period",
+    "Beginn": "time_start",
+    "Ende": "time_end",
+    "Fa": "subject",
+    "Le": "teacher",
+    "Ra": "room",
+    "Ku2": "course",
+    "Nr": "nr",
+    "If": "info",
+}
+# <Std> child tag → (attribute, value) marking the field as changed
+_LESSON_CHANGE_MARKERS: dict[str, tuple[str, str]] = {
+    "Fa": ("FaAe", "FaGeaendert"),
+    "Le": ("LeAe", "LeGeaendert"),
+    "Ra": ("RaAe", "RaGeaendert"),
+}
+
+
+class _IncrementalParser(Protocol[_T_co]):
+    """Parser that is fed a document chunk by chunk (see ``_SchoolPlanParser``)."""
+
+    def feed(self, data: str | bytes) -> None:
+        """Parse the next chunk of the document."""
+
+    def close(self) -> _T_co:
+        """Finish parsing and return the result."""
+
+
+class _Response:
+    """Outcome of one HTTP request: status, validators and (for 200) the body."""
+
+    __slots__ = ("status", "etag", "last_modified", "body", "streamed", "result")
+
+    def __init__(self, status: int, etag: str | None, last_modified: str | None) -> None:
+        """Initialize without body; ``result`` is set when the body was streamed."""
+        self.status = status
+        self.etag = etag
+        self.last_modified = last_modified
+        self.body = b""
+        self.streamed = False
+        self.result: Any = None
+
+
+class ScheduleRange:
+    """Outcome of ``async_get_schedule_range``: a result or an error per date."""
+
+    __slots__ = ("results", "errors")
+
+    def __init__(self) -> None:
+        """Initialize empty; filled in date order."""
+        # Date → schedule dict (see ``SchoolPlan.schedule``)
+        self.results: dict[date, dict[str, Any]] = {}
+        # Date → why it has no schedule (PlanNotPublishedError: no plan)
+        self.errors: dict[date, Exception] = {}
+
+
+class _SchoolCache:
+    """Parsed results and 404 answers shared by all clients of one school login."""
+
+    __slots__ = (
+        "http_cache",
+        "not_published",
+        "period_grid",
+        "period_grid_date",
+        "course_catalog",
+        "course_catalog_expires",
+        "__weakref__",
+    )
+
+    def __init__(self) -> None:
+        """Initialize empty caches."""
+        # Revalidation cache, keyed by path below the school directory:
+        # {"etag": str | None, "last_modified": str | None,
+        #  "version": str | None, "parsed": {memo_key: result}}
+        self.http_cache: dict[str, dict[str, Any]] = {}
+        # Plan paths that answered 404, mapped to the monotonic expiry time
+        self.not_published: dict[str, float] = {}
+        # Period times of the school, from the latest plan date parsed
+        self.period_grid = PeriodGrid()
+        self.period_grid_date: date | None = None
+        # Last non-empty course catalog and its monotonic expiry time
+        self.course_catalog: CourseCatalog | None = None
+        self.course_catalog_expires = 0.0
+
+
+# One cache per (school_id, username, password), alive while a client uses it,
+# so several config entries of a school parse each plan file only once.
+_SCHOOL_CACHES: weakref.WeakValueDictionary[tuple[str, str, str], _SchoolCache] = (
+    weakref.WeakValueDictionary()
+)
+
+
+def _not_published_ttl(plan_date: date, today: date) -> float:
+    """Return how many seconds a 404 for ``plan_date`` stays cached."""
+    days_ahead = (plan_date - today).days
+    if days_ahead < 0:
+        return _NOT_PUBLISHED_TTL_PAST
+    if plan_date.weekday() >= 5:
+        return _NOT_PUBLISHED_TTL_WEEKEND
+    if days_ahead <= 1:
+        return _NOT_PUBLISHED_TTL_NEAR
+    if days_ahead <= 7:
+        return _NOT_PUBLISHED_TTL_WEEK
+    return _NOT_PUBLISHED_TTL_FAR
+
 
 class Stundenplan24API:
     """API client for stundenplan24.de."""
@@ -22,78 +234,108 @@ class Stundenplan24API:
         username: str,
         password: str,
         base_url: str = "https://www.stundenplan24.de",
+        xml_cache: PlanXmlCache | None = None,
+        xml_cache_max_age: float = 15 * 60,
+        transport: VpMobile24Transport | None = None,
+        max_payload_size: int = DEFAULT_MAX_PAYLOAD_SIZE * 1024 * 1024,
+        parse_offload_size: int = DEFAULT_PARSE_OFFLOAD_SIZE * 1024,
+        parse_pool: ParsePool | None = None,
+        max_concurrent_fetches: int = DEFAULT_FETCH_CONCURRENCY,
+        xml_backend: str = BACKEND,
     ) -> None:
-        """Initialize the API client."""
+        """Initialize the API client.
+
+        ``xml_cache`` persists raw plan bodies across restarts; a cached body
+        younger than ``xml_cache_max_age`` seconds is used without asking the
+        server when nothing is in memory yet. ``transport`` is the shared
+        connection pool (inside HA: ``transport.async_get_transport(hass)``).
+        Downloads larger than ``max_payload_size`` bytes are aborted; files
+        larger than ``parse_offload_size`` bytes are parsed in a worker thread
+        instead of on the event loop, or in a process of ``parse_pool`` if
+        given (then plan files are not parsed while streaming).
+        ``async_get_schedule_range`` fetches up to ``max_concurrent_fetches``
+        dates at the same time. Plan files are parsed with ``xml_backend``
+        (lxml if installed, see ``xml_backend.BACKEND``).
+        """
         self.school_id = school_id
         self.username = username
         self.password = password
         self.base_url = base_url
-        self.session: aiohttp.ClientSession | None = None
-        self._session_lock: asyncio.Lock | None = None
+        # Mirrors known to host the school, ranked by health and latency
+        self.servers = ServerPool(base_url)
+        self._xml_cache = xml_cache
+        self._xml_cache_max_age = xml_cache_max_age
+        self.transport = transport or get_default_transport()
+        self.max_payload_size = max_payload_size
+        self.parse_offload_size = parse_offload_size
+        self.parse_pool = parse_pool
+        self.max_concurrent_fetches = max_concurrent_fetches
+        self.xml_backend = xml_backend
+        self._auth_headers = {"Authorization": basic_auth_header(username, password)}
+        cache_key = (school_id, username, password)
+        shared = _SCHOOL_CACHES.get(cache_key)
+        if shared is None:
+            shared = _SCHOOL_CACHES[cache_key] = _SchoolCache()
+        self._use_cache(shared)
+
+    def _use_cache(self, shared: _SchoolCache) -> None:
+        """Keep parsed results and 404 answers in ``shared``."""
+        self._school_cache = shared
+        self._http_cache = shared.http_cache
+        self._not_published = shared.not_published
+
+    @property
+    def period_grid(self) -> PeriodGrid:
+        """Period times of the school (empty until a plan with them was parsed)."""
+        return self._school_cache.period_grid
+
+    def restore_period_grid(self, grid: PeriodGrid) -> None:
+        """Use a stored ``grid`` until a parsed plan provides the period times."""
+        if not self._school_cache.period_grid:
+            self._school_cache.period_grid = grid
 
     async def async_get_session(self) -> aiohttp.ClientSession:
-        """Get or create aiohttp session (concurrency-safe)."""
-        if self._session_lock is None:
-            self._session_lock = asyncio.Lock()
-        async with self._session_lock:
-            if self.session is None:
-                self.session = aiohttp.ClientSession()
-        return self.session
+        """Return the pooled session of the shared transport."""
+        return await self.transport.async_get_session()
 
     async def async_test_connection(self) -> bool:
         """Test the connection to stundenplan24.
 
         Returns True if the server is reachable and credentials are accepted.
-        Falls back to www only if the configured server has no data at all.
+        If the configured server has no data at all, all mirrors are probed and
+        the fastest one hosting the school becomes the new ``base_url``.
         """
         try:
-            session = await self.async_get_session()
-            auth = BasicAuth(self.username, self.password)
-
-            status = await self._test_url(session, auth, self.base_url)
+            status = await self._test_url(self.base_url)
             if status == "ok":
                 return True
             if status == "auth_fail":
                 return False
 
-            # 404 on configured server — only fall back to www if it's not already www
-            # and the user didn't explicitly pick a zusatz server
-            if self.base_url != "https://www.stundenplan24.de":
-                _LOGGER.info(
-                    "VpMobile24: server %s returned 404, trying www fallback",
-                    self.base_url,
-                )
-                www_status = await self._test_url(
-                    session, auth, "https://www.stundenplan24.de"
-                )
-                if www_status == "ok":
-                    _LOGGER.info(
-                        "VpMobile24: www fallback succeeded, switching base_url"
-                    )
-                    self.base_url = "https://www.stundenplan24.de"
-                    return True
-                if www_status == "auth_fail":
-                    return False
-
+            _LOGGER.info(
+                "VpMobile24: server %s has no data, probing mirrors", self.base_url
+            )
+            results = await self.async_probe_servers()
+            hosting = [url for url in self.servers.ranked() if results.get(url) == "ok"]
+            if hosting:
+                _LOGGER.info("VpMobile24: switching base_url to %s", hosting[0])
+                self.base_url = hosting[0]
+                self.servers.reset(hosting[0])
+                return True
             return False
         except Exception as ex:
             _LOGGER.error("Error testing connection: %s", ex)
             return False
 
-    async def _test_url(
-        self,
-        session: aiohttp.ClientSession,
-        auth: BasicAuth,
-        base_url: str,
-    ) -> str:
+    async def _test_url(self, base_url: str) -> str:
         """Try plankl.html then Klassen.xml. Returns 'ok', 'auth_fail', or 'not_found'."""
         for path in [
             f"{base_url}/{self.school_id}/mobil/plankl.html",
             f"{base_url}/{self.school_id}/mobil/mobdaten/Klassen.xml",
         ]:
             try:
-                async with session.get(
-                    path, auth=auth, timeout=aiohttp.ClientTimeout(total=10)
+                async with self.transport.get(
+                    path, headers=self._auth_headers, timeout=10
                 ) as resp:
                     if resp.status == 200:
                         return "ok"
@@ -104,66 +346,584 @@ class Stundenplan24API:
                 return "not_found"
         return "not_found"
 
+    async def async_probe_servers(self) -> dict[str, str]:
+        """Probe every download mirror and update the server ranking.
+
+        Requests Klassen.xml from all ``DOWNLOAD_SERVERS`` concurrently. Mirrors
+        answering 200 are added to ``self.servers`` with their latency, mirrors
+        without the school are dropped again. Returns ``{base_url: status}``
+        with status 'ok', 'auth_fail', 'not_found' or 'error'.
+        """
+        base_urls = list(dict.fromkeys([self.base_url, *DOWNLOAD_SERVERS.values()]))
+        statuses = await asyncio.gather(
+            *(self._probe_server(base_url) for base_url in base_urls)
+        )
+        self.servers.update_slow_rounds()
+        results = dict(zip(base_urls, statuses))
+        _LOGGER.debug(
+            "VpMobile24: mirror probe %s, ranking %s", results, self.servers.ranked()
+        )
+        return results
+
+    async def _probe_server(self, base_url: str) -> str:
+        """Time one request to Klassen.xml on ``base_url`` and record it."""
+        url = f"{base_url}/{self.school_id}/mobil/mobdaten/Klassen.xml"
+        started = time.monotonic()
+        try:
+            async with self.transport.get(
+                url, headers=self._auth_headers, timeout=_PROBE_TIMEOUT
+            ) as response:
+                latency = time.monotonic() - started
+                status = response.status
+                if status == 200:
+                    await self._async_read_body(response, url)
+        except (aiohttp.ClientError, asyncio.TimeoutError, PayloadTooLargeError):
+            if base_url in self.servers.stats:
+                self.servers.stats[base_url].record_failure()
+            return "error"
+
+        if status == 200:
+            self.servers.add(base_url).record_success(latency)
+            return "ok"
+        if status in (401, 403, 404):
+            self.servers.discard(base_url)
+            return "auth_fail" if status != 404 else "not_found"
+        if base_url in self.servers.stats:
+            self.servers.stats[base_url].record_failure()
+        return "error"
+
     async def async_get_classes(self) -> list[str]:
         """Get list of available classes."""
         try:
-            session = await self.async_get_session()
-            auth = BasicAuth(self.username, self.password)
-            classes_url = f"{self.base_url}/{self.school_id}/mobil/mobdaten/Klassen.xml"
-            async with session.get(classes_url, auth=auth, timeout=aiohttp.ClientTimeout(total=10)) as response:
-                if response.status == 200:
-                    xml_content = await response.text()
-                    root = ET.fromstring(xml_content)
-                    classes = []
-                    for kl in root.findall(".//Kl"):
-                        kurz = kl.find("Kurz")
-                        if kurz is not None and kurz.text:
-                            classes.append(kurz.text)
-                    return classes
-                raise Exception(f"HTTP {response.status}")
+            return await self._async_get_parsed(
+                "mobil/mobdaten/Klassen.xml", 10, "classes", self._parse_classes
+            )
         except Exception as ex:
             _LOGGER.error("Error fetching classes: %s", ex)
             raise
 
-    async def async_get_teachers(self) -> list[str]:
-        """Get list of all teacher abbreviations from today's schedule XML.
+    @staticmethod
+    def _parse_classes(xml_content: str | bytes) -> list[str]:
+        """Parse the class abbreviations from Klassen.xml."""
+        root = fromstring(xml_content)
+        classes = []
+        for kl in root.findall(".//Kl"):
+            kurz = kl.find("Kurz")
+            if kurz is not None and kurz.text:
+                classes.append(kurz.text)
+        return classes
+
+    async def _async_get_parsed(
+        self,
+        path: str,
+        timeout: float,
+        memo_key: Any,
+        parse: Callable[[str | bytes], _T],
+        plan_date: date | None = None,
+        stream: Callable[[], _IncrementalParser[_T]] | None = None,
+        version: Callable[[bytes], str | None] | None = None,
+    ) -> _T:
+        """Download and parse an XML file, coalescing identical requests.
+
+        Concurrent calls for the same file, credentials and ``memo_key`` share
+        one download and parse (see ``_async_fetch_and_parse``).
+        """
+        url = f"{self.servers.configured}/{self.school_id}/{path}"
+        return await _async_single_flight(
+            (url, self.username, self.password, memo_key),
+            lambda: self._async_fetch_and_parse(
+                path, timeout, memo_key, parse, plan_date, stream, version
+            ),
+        )
+
+    async def _async_fetch_and_parse(
+        self,
+        path: str,
+        timeout: float,
+        memo_key: Any,
+        parse: Callable[[str | bytes], _T],
+        plan_date: date | None = None,
+        stream: Callable[[], _IncrementalParser[_T]] | None = None,
+        version: Callable[[bytes], str | None] | None = None,
+    ) -> _T:
+        """Download an XML file below the school directory and parse it.
+
+        The ETag / Last-Modified validators of every path are remembered and
+        sent as If-None-Match / If-Modified-Since on the next request. A 304
+        answer returns the result parsed earlier for the same ``memo_key``
+        without downloading or parsing the body again.
+
+        The request goes to the best mirror of ``self.servers``; on a timeout,
+        connection error or 5xx answer the next mirror is tried.
+
+        With ``stream`` given, a fresh incremental parser from that factory is
+        fed each chunk of a downloaded body as it arrives, so parsing overlaps
+        the download; ``parse`` is still used for bodies from the XML cache
+        and for bodies too large to be parsed on the event loop.
+
+        ``version`` reads the document's own version stamp from the start of a
+        body. When a new body (new validators, or a server that sends none)
+        carries the same stamp as the one parsed before, that result is
+        returned and the body is not parsed; a streamed body stops being
+        parsed as soon as its stamp is known (see ``_SkipIfUnchanged``).
+
+        Plan files (``plan_date`` given) are additionally persisted in the
+        on-disk XML cache, which seeds the validators after a restart, and a
+        404 for them is remembered for a while (see ``_not_published_ttl``).
+
+        Raises PlanNotPublishedError, AuthenticationError or TransientError.
+        """
+        expires = self._not_published.get(path)
+        if expires is not None:
+            if time.monotonic() < expires:
+                raise PlanNotPublishedError(f"HTTP 404 - {path} not available (cached)")
+            del self._not_published[path]
+
+        loop = asyncio.get_running_loop()
+
+        entry = self._http_cache.get(path)
+        validators: dict[str, Any] | None = None
+        disk_body: bytes | None = None
+        known: dict[str, Any] | None = None
+        if entry is not None and memo_key in entry["parsed"]:
+            validators = entry
+            if version is not None and entry["version"] is not None:
+                known = entry
+                if stream is not None:
+                    stream = functools.partial(
+                        _SkipIfUnchanged, stream, version,
+                        entry["version"], entry["parsed"][memo_key],
+                    )
+        elif plan_date is not None and self._xml_cache is not None:
+            cached = await loop.run_in_executor(
+                None, self._xml_cache.get, self.school_id, plan_date
+            )
+            if cached is not None:
+                validators, disk_body = cached
+                if time.time() - validators["checked"] < self._xml_cache_max_age:
+                    _LOGGER.debug("%s served from XML cache", path)
+                    result = await self._async_parse(parse, disk_body)
+                    self._remember(
+                        path, memo_key, result,
+                        validators["etag"], validators["last_modified"],
+                        version(disk_body) if version is not None else None,
+                    )
+                    return result
+
+        headers = dict(self._auth_headers)
+        if validators is not None:
+            if validators["etag"]:
+                headers["If-None-Match"] = validators["etag"]
+            if validators["last_modified"]:
+                headers["If-Modified-Since"] = validators["last_modified"]
+
+        response = await self._async_download(path, headers, timeout, stream)
+        status = response.status
+        etag = response.etag
+        last_modified = response.last_modified
+        body_version: str | None = None
+        if status == 304 and validators is not None:
+            if disk_body is None:
+                _LOGGER.debug("%s not modified, reusing parsed result", path)
+                return entry["parsed"][memo_key]
+            _LOGGER.debug("%s not modified, parsing body from XML cache", path)
+            await loop.run_in_executor(
+                None, self._xml_cache.touch, self.school_id, plan_date
+            )
+            result = await self._async_parse(parse, disk_body)
+            etag = validators["etag"]
+            last_modified = validators["last_modified"]
+            if version is not None:
+                body_version = version(disk_body)
+        elif status == 404:
+            if plan_date is not None:
+                ttl = _not_published_ttl(plan_date, date.today())
+                self._not_published[path] = time.monotonic() + ttl
+            raise PlanNotPublishedError(f"HTTP 404 - {path} not available")
+        elif status in (401, 403):
+            raise AuthenticationError(f"HTTP {status} - access to {path} denied")
+        elif status != 200:
+            raise TransientError(f"HTTP {status} - {path} not available")
+        else:
+            if plan_date is not None and self._xml_cache is not None:
+                await loop.run_in_executor(
+                    None, self._xml_cache.put,
+                    self.school_id, plan_date, response.body, etag, last_modified,
+                )
+            if version is not None:
+                body_version = version(response.body)
+            if known is not None and body_version == known["version"]:
+                _LOGGER.debug("%s has an unchanged version stamp, reusing parsed result", path)
+                result = known["parsed"][memo_key]
+            elif response.streamed:
+                result = response.result
+            else:
+                result = await self._async_parse(parse, response.body)
+
+        self._remember(path, memo_key, result, etag, last_modified, body_version)
+        return result
+
+    def _offload(self, size: int) -> bool:
+        """Return whether a body of ``size`` bytes is parsed in a worker thread."""
+        return size > self.parse_offload_size
+
+    async def _async_parse(self, parse: Callable[[bytes], _T], body: bytes) -> _T:
+        """Parse a complete body, in a worker thread or process if it is large.
+
+        With a parse pool, ``parse`` must be picklable (no lambda).
+        """
+        if self._offload(len(body)):
+            if self.parse_pool is not None:
+                return await self.parse_pool.async_run(parse, body)
+            return await asyncio.get_running_loop().run_in_executor(None, parse, body)
+        return parse(body)
+
+    async def _async_download(
+        self,
+        path: str,
+        headers: dict[str, str],
+        timeout: float,
+        stream: Callable[[], _IncrementalParser[Any]] | None = None,
+    ) -> _Response:
+        """GET ``path``, retrying transient failures with backoff and jitter.
+
+        Up to ``_RETRY_ATTEMPTS`` rounds over all mirrors are made, sleeping a
+        random time up to ``_RETRY_BASE_DELAY * 2**round`` in between. When all
+        circuit breakers are open, CircuitOpenError is raised at once.
+        """
+        attempt = 0
+        while True:
+            try:
+                return await self._async_download_once(path, headers, timeout, stream)
+            except CircuitOpenError:
+                raise
+            except TransientError as err:
+                attempt += 1
+                if attempt >= _RETRY_ATTEMPTS:
+                    raise
+                delay = random.uniform(
+                    0, min(_RETRY_MAX_DELAY, _RETRY_BASE_DELAY * 2 ** (attempt - 1))
+                )
+                _LOGGER.debug(
+                    "VpMobile24: %s, retrying in %.2f s (attempt %d/%d)",
+                    err, delay, attempt + 1, _RETRY_ATTEMPTS,
+                )
+                await asyncio.sleep(delay)
+
+    async def _async_download_once(
+        self,
+        path: str,
+        headers: dict[str, str],
+        timeout: float,
+        stream: Callable[[], _IncrementalParser[Any]] | None = None,
+    ) -> _Response:
+        """GET ``path`` from the best mirror, failing over to the next ones.
 
-        Scans all classes in the current day's plan and collects unique teacher
-        abbreviations from <Le> elements. Falls back to next/prev days if today
-        has no data (weekend, holiday).
+        Returns the response of the first mirror that gives a definite answer
+        (anything but a 5xx). ``timeout`` bounds each whole download; connecting
+        and waiting for data get an adaptive timeout from the mirror's own
+        latency percentiles. When the current mirror has not answered (sent its
+        response headers) within its p95, a hedged duplicate goes to the next
+        mirror and the first response wins. Mirrors whose circuit breaker is open
+        are skipped. TransientError is raised when every mirror failed,
+        CircuitOpenError when none was tried.
         """
+        ranked = [(base_url, self.servers.stats[base_url]) for base_url in self.servers.ranked()]
+        candidates = (candidate for candidate in ranked if candidate[1].allow_request())
+        pending: set[asyncio.Task] = set()
+        hedge_delay: float | None = None
+        last_error: TransientError | None = None
         try:
-            session = await self.async_get_session()
-            auth = BasicAuth(self.username, self.password)
-            teachers: set[str] = set()
-
-            # Try today ± a few days to get a day with actual data
-            today = date.today()
-            candidates = [today + timedelta(days=i) for i in range(0, 7)] + \
-                         [today - timedelta(days=i) for i in range(1, 4)]
-
-            for check_date in candidates:
-                date_str = check_date.strftime("%Y%m%d")
-                xml_url = f"{self.base_url}/{self.school_id}/mobil/mobdaten/PlanKl{date_str}.xml"
-                try:
-                    async with session.get(xml_url, auth=auth, timeout=aiohttp.ClientTimeout(total=10)) as response:
-                        if response.status != 200:
-                            continue
-                        xml_content = await response.text()
-                        root = ET.fromstring(xml_content)
-                        for le in root.findall(".//Le"):
-                            if le.text and le.text.strip():
-                                teachers.add(le.text.strip())
-                        if teachers:
-                            break  # found data — stop searching
-                except Exception:
+            while True:
+                if not pending:
+                    candidate = next(candidates, None)
+                    if candidate is None:
+                        break
+                    hedge_delay = candidate[1].hedge_delay
+                    answered = asyncio.Event()
+                    pending.add(asyncio.ensure_future(self._async_request(
+                        *candidate, path, headers, timeout, stream, answered
+                    )))
+                done, pending = await asyncio.wait(
+                    pending, timeout=hedge_delay, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    hedge_delay = None
+                    if answered.is_set():
+                        # Primary answered in time, its body is just large
+                        continue
+                    # Primary is slower than usual — race it against the next mirror
+                    candidate = next(candidates, None)
+                    if candidate is not None:
+                        _LOGGER.debug("VpMobile24: hedging %s on %s", path, candidate[0])
+                        pending.add(asyncio.ensure_future(
+                            self._async_request(*candidate, path, headers, timeout, stream)
+                        ))
                     continue
+                for task in done:
+                    err = task.exception()
+                    if err is None:
+                        return task.result()
+                    if not isinstance(err, TransientError):
+                        raise err
+                    last_error = err
+        finally:
+            for task in pending:
+                task.cancel()
+        if last_error is None:
+            raise CircuitOpenError(f"{path}: all servers unavailable (circuit open)")
+        raise last_error
+
+    async def _async_request(
+        self,
+        base_url: str,
+        stats: ServerStats,
+        path: str,
+        headers: dict[str, str],
+        timeout: float,
+        stream: Callable[[], _IncrementalParser[Any]] | None = None,
+        answered: asyncio.Event | None = None,
+    ) -> _Response:
+        """GET ``path`` from one mirror and record the outcome in ``stats``.
+
+        A 200 body is read in chunks of ``STREAM_CHUNK_SIZE``; with ``stream``
+        given each chunk is fed to a new incremental parser right away, unless
+        the body is too large for that (see ``_async_read_body``). ``answered``
+        is set once the response headers arrived.
+
+        The mirror's adaptive timeout applies to connecting and to each wait
+        for data; ``timeout`` bounds the whole request, body and parsing
+        included. The latency recorded is the time to the response headers,
+        so neither the size of the body nor parsing it skews the percentiles.
+        """
+        url = f"{base_url}/{self.school_id}/{path}"
+        started = time.monotonic()
+        try:
+            async with self.transport.get(
+                url,
+                headers=headers,
+                timeout=timeout,
+                read_timeout=stats.timeout(timeout),
+            ) as response:
+                latency = time.monotonic() - started
+                if answered is not None:
+                    answered.set()
+                result = _Response(
+                    response.status,
+                    response.headers.get("ETag"),
+                    response.headers.get("Last-Modified"),
+                )
+                if response.status == 200:
+                    result.body, parser = await self._async_read_body(response, path, stream)
+                    if parser is not None:
+                        result.result = parser.close()
+                        result.streamed = True
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+            stats.record_failure()
+            _LOGGER.debug("VpMobile24: %s failed on %s: %r", path, base_url, err)
+            raise TransientError(f"{path}: {err or type(err).__name__}") from err
+        except BaseException:
+            # Cancelled (a hedged request won) or the body did not parse
+            stats.record_abandoned()
+            raise
+        if result.status >= 500:
+            stats.record_failure()
+            _LOGGER.debug(
+                "VpMobile24: %s failed on %s: HTTP %s", path, base_url, result.status
+            )
+            raise TransientError(f"HTTP {result.status} - {path} not available")
+        stats.record_success(latency)
+        return result
+
+    async def _async_read_body(
+        self,
+        response: aiohttp.ClientResponse,
+        path: str,
+        stream: Callable[[], _IncrementalParser[Any]] | None = None,
+    ) -> tuple[bytes, _IncrementalParser[Any] | None]:
+        """Read the body as bytes, feeding each chunk to a parser from ``stream``.
+
+        Returns the body and the parser that was fed all of it (None if there
+        was none). The body is never decoded here — the XML parser honours the
+        encoding of the XML declaration itself. PayloadTooLargeError is raised
+        as soon as Content-Length or the received data exceed
+        ``max_payload_size``.
+
+        A body larger than ``parse_offload_size`` (by Content-Length, or once
+        the data received so far is) is not streamed: its chunks arrive
+        without the loop getting a turn in between, so feeding them inline
+        would block it for the whole file, and an lxml parser must stay on
+        the thread that created it, so they cannot be fed in executor jobs
+        either. Such a body is parsed whole in one job by the caller.
+        """
+        limit = self.max_payload_size
+        content_length = response.content_length
+        if content_length is not None and content_length > limit:
+            raise PayloadTooLargeError(
+                f"{path}: server announced {content_length} bytes, "
+                f"limit is {limit} bytes"
+            )
+        parser = None
+        if stream is not None and not (
+            content_length is not None and self._offload(content_length)
+        ):
+            parser = stream()
+        chunks: list[bytes] = []
+        size = 0
+        async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+            size += len(chunk)
+            if size > limit:
+                raise PayloadTooLargeError(
+                    f"{path}: download aborted after {size} bytes, limit is {limit} bytes"
+                )
+            chunks.append(chunk)
+            if parser is not None:
+                if self._offload(size):
+                    # Larger than announced (or not announced at all)
+                    parser = None
+                else:
+                    parser.feed(chunk)
+        return b"".join(chunks), parser
+
+    def _remember(
+        self,
+        path: str,
+        memo_key: Any,
+        result: Any,
+        etag: str | None,
+        last_modified: str | None,
+        version: str | None = None,
+    ) -> None:
+        """Store a parsed result under the validators it was parsed for."""
+        entry = self._http_cache.get(path)
+        if etag or last_modified or version:
+            if (
+                entry is None
+                or entry["etag"] != etag
+                or entry["last_modified"] != last_modified
+                or entry["version"] != version
+            ):
+                # New version of the document — results parsed from the old
+                # body are stale for every memo key, unless the document's
+                # own version stamp shows that its content is the same.
+                parsed = (
+                    entry["parsed"]
+                    if entry is not None and version and entry["version"] == version
+                    else {}
+                )
+                entry = {
+                    "etag": etag,
+                    "last_modified": last_modified,
+                    "version": version,
+                    "parsed": parsed,
+                }
+                self._http_cache[path] = entry
+            entry["parsed"][memo_key] = result
+        else:
+            self._http_cache.pop(path, None)
 
-            return sorted(teachers)
+    async def async_get_teachers(self) -> list[str]:
+        """Get list of all teacher abbreviations of the school.
+
+        Taken from the course catalog: the teachers of every class's
+        <Unterricht> block and of the lessons in that plan file.
+        """
+        try:
+            catalog = await self.async_get_course_catalog()
+            return sorted(catalog.teachers)
         except Exception as ex:
             _LOGGER.error("Error fetching teachers: %s", ex)
             return []
 
+    async def async_get_course_catalog(self, timeout: float = 10) -> CourseCatalog:
+        """Get the subjects, course groups and teachers of every class.
+
+        Built from the first plan file found among the school days from today
+        on (then the last few before today), fetched two dates at a time, so
+        usually one or two files are downloaded. The catalog is cached for the
+        school login for ``_COURSE_CATALOG_TTL`` seconds. An empty catalog is
+        returned when no plan is available; AuthenticationError is raised.
+        """
+        shared = self._school_cache
+        if (
+            shared.course_catalog is not None
+            and time.monotonic() < shared.course_catalog_expires
+        ):
+            return shared.course_catalog
+        return await _async_single_flight(
+            (f"course catalog of {self.school_id}", self.username, self.password),
+            lambda: self._async_build_course_catalog(timeout),
+        )
+
+    async def _async_build_course_catalog(self, timeout: float) -> CourseCatalog:
+        """Build the course catalog from the first available plan file."""
+        today = date.today()
+        candidates = [
+            day
+            for day in (
+                *(today + timedelta(days=i) for i in range(0, 8)),
+                *(today - timedelta(days=i) for i in range(1, 4)),
+            )
+            if day.weekday() < 5
+        ]
+        for i in range(0, len(candidates), _COURSE_CATALOG_BATCH):
+            batch = candidates[i:i + _COURSE_CATALOG_BATCH]
+            plans = await asyncio.gather(
+                *(self.async_get_school_plan(day, timeout) for day in batch),
+                return_exceptions=True,
+            )
+            for day, plan in zip(batch, plans):
+                if isinstance(plan, AuthenticationError):
+                    raise plan
+                if isinstance(plan, BaseException):
+                    _LOGGER.debug("No plan for the course catalog on %s: %s", day, plan)
+                    continue
+                catalog = CourseCatalog.from_plan(plan)
+                if catalog:
+                    _LOGGER.debug("Course catalog built from the plan of %s", day)
+                    self._school_cache.course_catalog = catalog
+                    self._school_cache.course_catalog_expires = (
+                        time.monotonic() + _COURSE_CATALOG_TTL
+                    )
+                    return catalog
+        return CourseCatalog()
+
+    async def async_get_school_plan(
+        self, target_date: date | None = None, timeout: float = 15
+    ) -> SchoolPlan:
+        """Get the whole school's plan of a date, indexed by class, teacher and room.
+
+        The plan file is parsed once per version; the result is shared by all
+        clients of the same school login, so treat it as read-only.
+        """
+        if target_date is None:
+            target_date = date.today()
+
+        date_str = target_date.strftime("%Y%m%d")
+        plan = await self._async_get_parsed(
+            f"mobil/mobdaten/PlanKl{date_str}.xml",
+            timeout,
+            "plan",
+            functools.partial(
+                parse_school_plan, target_date=target_date, backend=self.xml_backend
+            ),
+            plan_date=target_date,
+            # Worker processes get the complete body instead
+            stream=(
+                None if self.parse_pool is not None
+                else lambda: _SchoolPlanParser(target_date, self.xml_backend)
+            ),
+            # A re-uploaded file with the same <zeitstempel> is not parsed again
+            version=plan_timestamp,
+        )
+        shared = self._school_cache
+        if plan.period_grid and (
+            shared.period_grid_date is None or target_date >= shared.period_grid_date
+        ):
+            shared.period_grid = plan.period_grid
+            shared.period_grid_date = target_date
+        return plan
+
     async def async_get_schedule(
         self,
         target_date: date | None = None,
@@ -172,126 +932,95 @@ class Stundenplan24API:
     ) -> dict[str, Any]:
         """Get schedule data from stundenplan24."""
         try:
-            session = await self.async_get_session()
-            auth = BasicAuth(self.username, self.password)
-
             if target_date is None:
                 target_date = date.today()
 
-            date_str = target_date.strftime("%Y%m%d")
-            xml_url = f"{self.base_url}/{self.school_id}/mobil/mobdaten/PlanKl{date_str}.xml"
-
-            async with session.get(xml_url, auth=auth, timeout=aiohttp.ClientTimeout(total=15)) as response:
-                if response.status == 200:
-                    xml_content = await response.text()
-                    return self._parse_xml_schedule(xml_content, target_date, class_name, teacher_short)
-                raise Exception(f"HTTP {response.status} - Schedule not available for {target_date}")
+            plan = await self.async_get_school_plan(target_date)
+            return plan.schedule(class_name, teacher_short)
 
+        except PlanNotPublishedError:
+            _LOGGER.debug("Schedule not available for %s (404 - weekend/holiday)", target_date)
+            raise
         except Exception as ex:
-            ex_str = str(ex)
-            if "404" in ex_str:
-                _LOGGER.debug("Schedule not available for %s (404 - weekend/holiday)", target_date)
-            else:
-                _LOGGER.debug("Error fetching schedule for %s: %s", target_date, ex)
+            _LOGGER.debug("Error fetching schedule for %s: %s", target_date, ex)
             raise
 
-    def _parse_xml_schedule(
+    async def async_get_warm_dates(self, dates: Iterable[date]) -> set[date]:
+        """Return those of ``dates`` that can be answered without a request.
+
+        That is a plan body in the XML cache younger than ``xml_cache_max_age``
+        or a 404 that is still remembered.
+        """
+        dates = set(dates)
+        now = time.monotonic()
+        warm = {
+            day
+            for day in dates
+            if self._not_published.get(f"mobil/mobdaten/PlanKl{day.strftime('%Y%m%d')}.xml", 0) > now
+        }
+        if self._xml_cache is not None and dates - warm:
+            warm |= await asyncio.get_running_loop().run_in_executor(
+                None, self._xml_cache.fresh_dates,
+                self.school_id, dates - warm, self._xml_cache_max_age,
+            )
+        return warm
+
+    async def async_get_schedule_range(
         self,
-        xml_content: str,
-        target_date: date,
+        start: date,
+        end: date,
         class_name: str | None = None,
         teacher_short: str | None = None,
-    ) -> dict[str, Any]:
-        """Parse XML schedule data."""
-        try:
-            root = ET.fromstring(xml_content)
-
-            schedule_data: dict[str, Any] = {
-                "date": target_date.isoformat(),
-                "lessons": [],
-                "changes": [],
-                "additional_info": [],
-                "last_updated": datetime.now().isoformat(),
-                "timestamp": "",
-                "classes": [],
-            }
+        *,
+        skip: Container[date] = (),
+        weekdays_only: bool = False,
+    ) -> ScheduleRange:
+        """Get the schedules of all dates from ``start`` to ``end`` (inclusive).
 
-            zeitstempel = root.find(".//zeitstempel")
-            if zeitstempel is not None and zeitstempel.text:
-                schedule_data["timestamp"] = zeitstempel.text
-
-            zusatz_info = root.find(".//ZusatzInfo")
-            if zusatz_info is not None:
-                for zi_zeile in zusatz_info.findall("ZiZeile"):
-                    if zi_zeile.text and zi_zeile.text.strip():
-                        schedule_data["additional_info"].append({
-                            "text": zi_zeile.text.strip(),
-                            "type": "general_info",
-                        })
-
-            classes_to_process = []
-            for kl in root.findall(".//Kl"):
-                kurz = kl.find("Kurz")
-                if kurz is not None and kurz.text:
-                    # Teacher mode: process ALL classes (filter by teacher later)
-                    # Student mode: only process the selected class
-                    if teacher_short is not None or class_name is None or kurz.text == class_name:
-                        classes_to_process.append((kurz.text, kl))
-                        schedule_data["classes"].append(kurz.text)
-
-            for class_short, kl_element in classes_to_process:
-                # ── Build set of lesson-numbers (Nr) from Unterricht block ──
-                # Each <UeNr> has a lesson number; <Nr> in <Std> references it.
-                # This tells us which lessons actually belong to THIS class/student.
-                unterricht_nrs: set[str] = set()
-                # In teacher mode skip the Unterricht filter — teachers see all lessons
-                if not teacher_short:
-                    unterricht_el = kl_element.find("Unterricht")
-                    if unterricht_el is not None:
-                        for ue in unterricht_el.findall("Ue"):
-                            ue_nr = ue.find("UeNr")
-                            if ue_nr is not None and ue_nr.text:
-                                unterricht_nrs.add(ue_nr.text.strip())
-
-                pl_element = kl_element.find("Pl")
-                if pl_element is not None:
-                    for std in pl_element.findall("Std"):
-                        lesson = self._parse_lesson(std, class_short)
-                        if lesson:
-                            # ── Teacher mode: only keep lessons for this teacher ──
-                            if teacher_short:
-                                lesson_teacher = lesson.get("teacher", "").strip()
-                                if lesson_teacher.upper() != teacher_short.upper():
-                                    continue
-                            else:
-                                # Filter by Unterricht membership when possible
-                                lesson_nr = lesson.get("nr", "")
-                                if unterricht_nrs and lesson_nr and lesson_nr not in unterricht_nrs:
-                                    # This lesson belongs to a parallel group not in the student's Unterricht
-                                    continue
-                            if lesson.get("is_change", False):
-                                schedule_data["changes"].append(lesson)
-                            else:
-                                schedule_data["lessons"].append(lesson)
-
-            schedule_data["lessons"] = self._sort_lessons(schedule_data["lessons"])
-            schedule_data["changes"] = self._sort_lessons(schedule_data["changes"])
-            return schedule_data
-
-        except ET.ParseError as e:
-            _LOGGER.error("XML parsing error: %s", e)
-            raise Exception(f"Invalid XML data: {e}") from e
-        except Exception as e:
-            _LOGGER.error("Error parsing schedule: %s", e)
-            raise
+        Up to ``max_concurrent_fetches`` dates are fetched at the same time,
+        those nearest to today first. A failing date does not affect the
+        others: every date ends up in either ``results`` or ``errors``, except
+        those in ``skip`` and, with ``weekdays_only``, Saturdays and Sundays.
+        Once every server's circuit breaker is open, the dates not requested
+        yet get that CircuitOpenError without a request.
+        """
+        days = [
+            day
+            for day in (start + timedelta(days=i) for i in range((end - start).days + 1))
+            if day not in skip and not (weekdays_only and day.weekday() >= 5)
+        ]
+        semaphore = asyncio.Semaphore(self.max_concurrent_fetches)
+        circuit_open: list[CircuitOpenError] = []
 
-    def _parse_lesson(
-        self, std_element: ET.Element, class_name: str
-    ) -> dict[str, Any] | None:
+        async def _fetch(day: date) -> dict[str, Any]:
+            async with semaphore:
+                if circuit_open:
+                    raise circuit_open[0]
+                try:
+                    return await self.async_get_schedule(day, class_name, teacher_short)
+                except CircuitOpenError as err:
+                    circuit_open.append(err)
+                    raise
+
+        # The semaphore lets waiting fetches in by arrival, i.e. in this order
+        today = date.today()
+        days.sort(key=lambda day: (abs((day - today).days), day))
+        outcomes = await asyncio.gather(*(_fetch(day) for day in days), return_exceptions=True)
+        fetched = ScheduleRange()
+        for day, outcome in sorted(zip(days, outcomes), key=lambda item: item[0]):
+            if isinstance(outcome, Exception):
+                fetched.errors[day] = outcome
+            elif isinstance(outcome, BaseException):
+                raise outcome
+            else:
+                fetched.results[day] = outcome
+        return fetched
+
+    @staticmethod
+    def _parse_lesson(std_element: Element, class_name: str) -> Lesson | None:
         """Parse a single lesson from XML."""
         try:
             lesson: dict[str, Any] = {
-                "class": class_name,
                 "period": "",
                 "time_start": "",
                 "time_end": "",
@@ -304,46 +1033,23 @@ class Stundenplan24API:
                 "nr": "",
             }
 
-            st = std_element.find("St")
-            if st is not None and st.text:
-                lesson["period"] = st.text
-
-            beginn = std_element.find("Beginn")
-            ende = std_element.find("Ende")
-            if beginn is not None and beginn.text:
-                lesson["time_start"] = beginn.text
-            if ende is not None and ende.text:
-                lesson["time_end"] = ende.text
-
-            fa = std_element.find("Fa")
-            if fa is not None and fa.text:
-                lesson["subject"] = fa.text
-                if fa.get("FaAe") == "FaGeaendert":
-                    lesson["is_change"] = True
-
-            le = std_element.find("Le")
-            if le is not None and le.text:
-                lesson["teacher"] = le.text
-                if le.get("LeAe") == "LeGeaendert":
-                    lesson["is_change"] = True
-
-            ra = std_element.find("Ra")
-            if ra is not None and ra.text:
-                lesson["room"] = ra.text
-                if ra.get("RaAe") == "RaGeaendert":
-                    lesson["is_change"] = True
-
-            ku2 = std_element.find("Ku2")
-            if ku2 is not None and ku2.text:
-                lesson["course"] = ku2.text
-
-            nr = std_element.find("Nr")
-            if nr is not None and nr.text:
-                lesson["nr"] = nr.text.strip()
-
-            info = std_element.find("If")
-            if info is not None and info.text:
-                lesson["info"] = info.text
+            # One pass over the children instead of a find() per field
+            for child in std_element:
+                text = child.text
+                if not text:
+                    continue
+                tag = child.tag
+                field = _LESSON_FIELDS.get(tag)
+                if field is None:
+                    continue
+                lesson[field] = text
+                if child.attrib:
+                    marker = _LESSON_CHANGE_MARKERS.get(tag)
+                    if marker is not None and child.get(marker[0]) == marker[1]:
+                        lesson["is_change"] = True
+
+            lesson["nr"] = lesson["nr"].strip()
+            if lesson["info"]:
                 lesson["is_change"] = True
 
             # If subject is empty but info text AND teacher are present,
@@ -364,39 +1070,177 @@ class Stundenplan24API:
                 lesson["time"] = f"{lesson['period']}. Stunde"
 
             if lesson["period"] or lesson["subject"]:
-                return lesson
+                return Lesson(class_name, **lesson)
             return None
 
         except Exception as e:
             _LOGGER.error("Error parsing lesson: %s", e)
             return None
 
-    def _sort_lessons(self, lessons: list[dict]) -> list[dict]:
-        """Sort lessons by period, class, then start time."""
-        def sort_key(lesson: dict):
-            try:
-                period = int(lesson.get("period", "0"))
-            except (ValueError, TypeError):
-                period = 999
-            class_name = lesson.get("class", "")
-            time_start = lesson.get("time_start", "")
-            try:
-                if time_start and ":" in time_start:
-                    h, m = map(int, time_start.split(":"))
-                    time_sort = h * 60 + m
-                else:
-                    time_sort = 999
-            except (ValueError, TypeError):
-                time_sort = 999
-            return (period, class_name, time_sort)
+    async def async_close(self) -> None:
+        """Release cached data (shared caches and transport stay for others)."""
+        self._use_cache(_SchoolCache())
+
+
+class _SkipIfUnchanged:
+    """Incremental parser that is skipped when the document is already known.
+
+    Chunks are held back until ``version`` can read the version stamp from
+    the start of the document. If it equals ``known_version``, the rest of
+    the document is ignored and ``close()`` returns ``known_result``;
+    otherwise everything is passed on to a parser from ``factory``.
+    """
+
+    __slots__ = ("_factory", "_version", "_known_version", "_known_result", "_head", "_parser")
 
+    def __init__(
+        self,
+        factory: Callable[[], _IncrementalParser[_T]],
+        version: Callable[[bytes], str | None],
+        known_version: str,
+        known_result: _T,
+    ) -> None:
+        """Initialize; nothing is parsed until the version stamp is known."""
+        self._factory = factory
+        self._version = version
+        self._known_version = known_version
+        self._known_result = known_result
+        # Start of the document while undecided, None afterwards
+        self._head: bytes | None = b""
+        # Parser of a changed document; None while undecided or when skipped
+        self._parser: _IncrementalParser[_T] | None = None
+
+    def feed(self, data: bytes) -> None:
+        """Pass the chunk on, or hold it back until the stamp is known."""
+        if self._head is None:
+            if self._parser is not None:
+                self._parser.feed(data)
+            return
+        self._head += data
+        if len(self._head) >= TIMESTAMP_PREFIX_SIZE or self._version(self._head):
+            self._decide()
+
+    def close(self) -> Any:
+        """Return the known result or the result of the real parser."""
+        if self._head is not None:
+            self._decide()
+        if self._parser is None:
+            return self._known_result
+        return self._parser.close()
+
+    def _decide(self) -> None:
+        head = self._head
+        self._head = None
+        if self._version(head) != self._known_version:
+            self._parser = self._factory()
+            self._parser.feed(head)
+
+
+def parse_school_plan(
+    xml_content: str | bytes, target_date: date, backend: str = BACKEND
+) -> SchoolPlan:
+    """Parse a complete PlanKl file (picklable, for worker processes)."""
+    parser = _SchoolPlanParser(target_date, backend)
+    parser.feed(xml_content)
+    return parser.close()
+
+
+class _SchoolPlanParser:
+    """Incremental parser of a PlanKl file into a ``SchoolPlan``.
+
+    Fed chunk by chunk while the file downloads. Every ``<Kl>`` is turned into
+    lessons as soon as its end tag arrives and is cleared right after, so only
+    one class is held as a tree at a time, however large the school is.
+    Uses lxml when installed (see ``xml_backend``).
+    """
+
+    _TAGS = ("Kl", "zeitstempel", "ZiZeile")
+
+    def __init__(self, target_date: date, backend: str = BACKEND) -> None:
+        """Initialize the parser for one plan date."""
+        self._parser = pull_parser(self._TAGS, backend=backend)
+        self._plan = SchoolPlan(target_date)
+        # Compiled per parser: lxml's XPath objects must not be shared
+        # between threads
+        self._unterricht_nrs = compile_path("Unterricht[1]/Ue/UeNr[1]", backend=backend)
+        self._stds = compile_path("Pl[1]/Std", backend=backend)
+        self._period_rows = compile_path("KlStunden[1]/KlSt", backend=backend)
+        # Period → (start, end) in minutes; the first class listing a period wins
+        self._period_times: dict[int, tuple[int, int]] = {}
+
+    def feed(self, data: str | bytes) -> None:
+        """Parse the next chunk and process every element completed by it."""
         try:
-            return sorted(lessons, key=sort_key)
-        except Exception:
-            return lessons
+            self._parser.feed(data)
+            # ElementTree reports errors only when the events are read
+            self._process_events()
+        except ParseError as e:
+            _LOGGER.error("XML parsing error: %s", e)
+            raise Exception(f"Invalid XML data: {e}") from e
 
-    async def async_close(self) -> None:
-        """Close the aiohttp session."""
-        if self.session:
-            await self.session.close()
-            self.session = None
+    def close(self) -> SchoolPlan:
+        """Finish parsing and return the plan."""
+        try:
+            self._parser.close()
+            self._process_events()
+        except ParseError as e:
+            _LOGGER.error("XML parsing error: %s", e)
+            raise Exception(f"Invalid XML data: {e}") from e
+        self._plan.period_grid = PeriodGrid(self._period_times)
+        return self._plan
+
+    def _process_events(self) -> None:
+        plan = self._plan
+        for _event, element in self._parser.read_events():
+            tag = element.tag
+            if tag == "Kl":
+                kurz = element.find("Kurz")
+                if kurz is not None and kurz.text:
+                    self._add_class(kurz.text, element)
+                element.clear()
+            elif tag == "zeitstempel":
+                if element.text and not plan.timestamp:
+                    plan.timestamp = element.text
+            elif tag == "ZiZeile":
+                if element.text and element.text.strip():
+                    plan.additional_info.append({
+                        "text": element.text.strip(),
+                        "type": "general_info",
+                    })
+
+    def _add_class(self, class_short: str, kl_element: Element) -> None:
+        # ── Build set of lesson-numbers (Nr) from Unterricht block ──
+        # Each <UeNr> has a lesson number; <Nr> in <Std> references it.
+        # This tells us which lessons actually belong to a class's students.
+        # Its attributes name the course: <UeNr UeLe=".." UeFa=".." UeGr="..">
+        unterricht_nrs: set[str] = set()
+        courses: list[tuple[str, str, str]] = []
+        for ue_nr in self._unterricht_nrs(kl_element):
+            if ue_nr.text:
+                unterricht_nrs.add(ue_nr.text.strip())
+            subject = ue_nr.get("UeFa", "").strip()
+            if subject:
+                courses.append((
+                    subject,
+                    ue_nr.get("UeLe", "").strip(),
+                    ue_nr.get("UeGr", "").strip(),
+                ))
+
+        # ── Period times: <KlSt ZeitVon="07:30" ZeitBis="08:15">1</KlSt> ──
+        period_times = self._period_times
+        for row in self._period_rows(kl_element):
+            period = parse_period(row.text.strip()) if row.text else None
+            if period is None or period in period_times:
+                continue
+            start = parse_minutes(row.get("ZeitVon", ""))
+            end = parse_minutes(row.get("ZeitBis", ""))
+            if start is not None and end is not None:
+                period_times[period] = (start, end)
+
+        lessons = []
+        parse_lesson = Stundenplan24API._parse_lesson
+        for std in self._stds(kl_element):
+            lesson = parse_lesson(std, class_short)
+            if lesson is not None:
+                lessons.append(lesson)
+        self._plan.add_class(class_short, lessons, unterricht_nrs, courses)
@@ -1,7 +1,7 @@
 """Calendar platform for vpmobile24."""
 from __future__ import annotations
 
-from datetime import datetime, date, timedelta
+from datetime import datetime, date, time, timedelta
 from typing import Any
 
 from homeassistant.components.calendar import CalendarEntity, CalendarEvent
@@ -12,6 +12,7 @@ from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.util import dt as dt_util
 
 from .const import DOMAIN
+from .models import Lesson
 
 
 CALENDAR_NAMES = {
@@ -164,39 +165,37 @@ class VpMobile24WeekCalendar(CoordinatorEntity, CalendarEntity):
         
         return events
 
-    def _create_event_from_lesson(self, lesson: dict, target_date: date, is_change: bool = False) -> CalendarEvent | None:
+    def _create_event_from_lesson(self, lesson: Lesson, target_date: date, is_change: bool = False) -> CalendarEvent | None:
         """Create a calendar event from a lesson."""
         try:
-            time_start = lesson.get("time_start", "")
-            time_end = lesson.get("time_end", "")
+            start_min = lesson.start_min
+            end_min = lesson.end_min
+            if (start_min is None or end_min is None) and lesson.period_num is not None:
+                # Fill in missing times from the school's period grid
+                times = self.coordinator.period_grid.times(lesson.period_num)
+                if times is not None:
+                    if start_min is None:
+                        start_min = times[0]
+                    if end_min is None:
+                        end_min = times[1]
             subject = lesson.get("subject", "")
             teacher = lesson.get("teacher", "")
             room = lesson.get("room", "")
             period = lesson.get("period", "")
             info = lesson.get("info", "")
             
-            if not time_start or not subject:
+            if start_min is None or end_min is None or end_min <= start_min or not subject:
                 return None
             
             # Get Home Assistant timezone
             tz = dt_util.get_default_time_zone()
             
-            # Parse times
-            start_hour, start_minute = map(int, time_start.split(":"))
             start_datetime = datetime.combine(
-                target_date, 
-                datetime.min.time().replace(hour=start_hour, minute=start_minute)
-            ).replace(tzinfo=tz)
-            
-            if time_end:
-                end_hour, end_minute = map(int, time_end.split(":"))
-                end_datetime = datetime.combine(
-                    target_date, 
-                    datetime.min.time().replace(hour=end_hour, minute=end_minute)
-                ).replace(tzinfo=tz)
-            else:
-                # Default to 45 minutes if no end time
-                end_datetime = start_datetime + timedelta(minutes=45)
+                target_date, time(*divmod(start_min, 60)), tzinfo=tz
+            )
+            end_datetime = datetime.combine(
+                target_date, time(*divmod(end_min, 60)), tzinfo=tz
+            )
             
             # Create summary
             summary = subject
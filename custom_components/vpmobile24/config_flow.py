@@ -1,10 +1,8 @@
 """Config flow for vpmobile24 integration."""
 from __future__ import annotations
 
-import asyncio
 import logging
 from typing import Any
-from datetime import date, timedelta
 
 import voluptuous as vol
 
@@ -13,6 +11,8 @@ from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
 from homeassistant.data_entry_flow import FlowResult
 
 from .api_new import Stundenplan24API
+from .models import CourseCatalog
+from .transport import async_get_transport
 from .const import (
     CONF_SCHOOL_ID,
     CONF_CLASS_NAME,
@@ -24,7 +24,21 @@ from .const import (
     CONF_TEACHER_SHORT,
     CONF_USER_MODE,
     CONF_DEMO_MODE,
+    CONF_MAX_PAYLOAD_SIZE,
+    CONF_PARSE_OFFLOAD_SIZE,
+    CONF_PARSE_PROCESSES,
+    CONF_FETCH_CONCURRENCY,
+    CONF_PREFETCH_WEEKS,
+    ADVANCED_OPTIONS,
     DEFAULT_BASE_URL,
+    DEFAULT_MAX_PAYLOAD_SIZE,
+    DEFAULT_PARSE_OFFLOAD_SIZE,
+    DEFAULT_PARSE_PROCESSES,
+    DEFAULT_FETCH_CONCURRENCY,
+    DEFAULT_PREFETCH_WEEKS,
+    MAX_PARSE_PROCESSES,
+    MAX_FETCH_CONCURRENCY,
+    MAX_PREFETCH_WEEKS,
     DOWNLOAD_SERVERS,
     DOMAIN,
     GERMAN_STATES,
@@ -33,6 +47,32 @@ from .const import (
 _LOGGER = logging.getLogger(__name__)
 
 
+def _subject_choices(catalog: CourseCatalog, class_name: str) -> list[str]:
+    """Return the subjects and course groups of a class to choose from.
+
+    Course groups (Ku2) are listed too, so parallel groups can be deselected.
+    """
+    choices: set[str] = set()
+    for subject in catalog.subjects.get(class_name, ()):
+        if (
+            not subject.startswith("KPL")
+            and not subject.startswith("---")
+            and not subject.startswith("Pause")
+            and not subject.startswith("Mittagspause")
+            and not subject.lower().startswith("frei")
+            and 2 <= len(subject) <= 10
+        ):
+            choices.add(subject)
+    for course in catalog.courses.get(class_name, ()):
+        if (
+            not course.startswith("KPL")
+            and not course.startswith("---")
+            and 2 <= len(course) <= 12
+        ):
+            choices.add(course)
+    return sorted(choices)
+
+
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for vpmobile24."""
 
@@ -98,6 +138,7 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     username=resolved_username,
                     password=user_input[CONF_PASSWORD],
                     base_url=base_url,
+                    transport=async_get_transport(self.hass),
                 )
                 connection_ok = await self._api.async_test_connection()
                 if not connection_ok:
@@ -156,6 +197,7 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                         username=custom_username,
                         password=self._config_data[CONF_PASSWORD],
                         base_url=base_url,
+                        transport=async_get_transport(self.hass),
                     )
                     connection_ok = await self._api.async_test_connection()
                     if not connection_ok:
@@ -293,47 +335,8 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             else:
                 self._config_data[CONF_CLASS_NAME] = class_name
                 try:
-                    all_subjects: set[str] = set()
-                    today = date.today()
-                    dates_to_check = [today + timedelta(days=i) for i in range(-7, 21)]
-
-                    async def _fetch_subjects_for_date(check_date: date) -> set[str]:
-                        found: set[str] = set()
-                        try:
-                            schedule_data = await self._api.async_get_schedule(
-                                target_date=check_date,
-                                class_name=class_name,
-                            )
-                            for entry in schedule_data.get("lessons", []) + schedule_data.get("changes", []):
-                                subject = (entry.get("subject") or "").strip()
-                                course  = (entry.get("course")  or "").strip()
-                                if (
-                                    subject
-                                    and not subject.startswith("KPL")
-                                    and not subject.startswith("---")
-                                    and not subject.startswith("Pause")
-                                    and not subject.startswith("Mittagspause")
-                                    and not subject.lower().startswith("frei")
-                                    and 2 <= len(subject) <= 10
-                                ):
-                                    found.add(subject)
-                                # Also include course (Ku2) so parallel groups can be deselected
-                                if (
-                                    course
-                                    and not course.startswith("KPL")
-                                    and not course.startswith("---")
-                                    and 2 <= len(course) <= 12
-                                    and course != subject
-                                ):
-                                    found.add(course)
-                        except Exception as err:
-                            _LOGGER.debug("Could not fetch schedule for %s: %s", check_date, err)
-                        return found
-
-                    results = await asyncio.gather(*[_fetch_subjects_for_date(d) for d in dates_to_check])
-                    for s in results:
-                        all_subjects.update(s)
-                    self._available_subjects = sorted(list(all_subjects))
+                    catalog = await self._api.async_get_course_catalog()
+                    self._available_subjects = _subject_choices(catalog, class_name)
                     await self._api.async_close()
                     return await self.async_step_subjects()
                 except Exception as err:
@@ -463,6 +466,14 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
         self._change_subjects: bool = False
         self._available_classes: list[str] = []
 
+    def _kept_options(self) -> dict[str, Any]:
+        """Return the advanced settings, which every options step carries over."""
+        return {
+            key: self._config_entry.options[key]
+            for key in ADVANCED_OPTIONS
+            if key in self._config_entry.options
+        }
+
     async def async_step_init(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
@@ -473,9 +484,10 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
             change_holidays    = user_input.get("change_holidays", False)
             change_credentials = user_input.get("change_credentials", False)
             change_teacher     = user_input.get("change_teacher", False)
+            change_advanced    = user_input.get("change_advanced", False)
 
-            if not any([change_class, change_subjects, change_holidays, change_credentials, change_teacher]):
-                return self.async_create_entry(title="", data={})
+            if not any([change_class, change_subjects, change_holidays, change_credentials, change_teacher, change_advanced]):
+                return self.async_create_entry(title="", data=self._kept_options())
 
             if change_credentials:
                 return await self.async_step_change_credentials()
@@ -483,6 +495,9 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
             if change_teacher:
                 return await self.async_step_change_teacher()
 
+            if change_advanced:
+                return await self.async_step_advanced()
+
             if change_holidays and not change_class and not change_subjects:
                 return await self.async_step_change_holidays()
 
@@ -517,6 +532,7 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
         else:
             schema_dict[vol.Optional("change_subjects", default=False)] = bool
             schema_dict[vol.Optional("change_class", default=False)] = bool
+        schema_dict[vol.Optional("change_advanced", default=False)] = bool
 
         placeholders = {
             "current_class": current_teacher if is_teacher_mode else current_class,
@@ -555,6 +571,7 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                     username=resolved_username,
                     password=user_input[CONF_PASSWORD],
                     base_url=base_url,
+                    transport=async_get_transport(self.hass),
                 )
                 connection_ok = await api.async_test_connection()
                 corrected_key = next(
@@ -573,7 +590,7 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                     self.hass.config_entries.async_update_entry(
                         self._config_entry, data=new_data
                     )
-                    return self.async_create_entry(title="", data={})
+                    return self.async_create_entry(title="", data=self._kept_options())
             except Exception:
                 errors["base"] = "unknown"
 
@@ -618,6 +635,7 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                         username=custom_username,
                         password=cred[CONF_PASSWORD],
                         base_url=base_url,
+                        transport=async_get_transport(self.hass),
                     )
                     connection_ok = await api.async_test_connection()
                     corrected_key = next(
@@ -636,7 +654,7 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                         self.hass.config_entries.async_update_entry(
                             self._config_entry, data=new_data
                         )
-                        return self.async_create_entry(title="", data={})
+                        return self.async_create_entry(title="", data=self._kept_options())
                 except Exception:
                     errors["base"] = "unknown"
 
@@ -666,7 +684,7 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                 self.hass.config_entries.async_update_entry(
                     self._config_entry, data=new_data, title=new_title
                 )
-                return self.async_create_entry(title="", data={})
+                return self.async_create_entry(title="", data=self._kept_options())
 
         # Try to load teacher list for dropdown
         try:
@@ -682,6 +700,7 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                 username=self._config_entry.data[CONF_USERNAME],
                 password=self._config_entry.data[CONF_PASSWORD],
                 base_url=base_url,
+                transport=async_get_transport(self.hass),
             )
             teachers = await api.async_get_teachers()
             await api.async_close()
@@ -726,6 +745,7 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
             return self.async_create_entry(
                 title="",
                 data={
+                    **self._kept_options(),
                     CONF_CLASS_NAME: current_class,
                     CONF_EXCLUDED_SUBJECTS: current_excluded,
                     CONF_SELECTED_COURSES: current_selected,
@@ -747,6 +767,47 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
             }),
         )
 
+    async def async_step_advanced(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Advanced settings — download limits, parsing and pre-fetching."""
+        if user_input is not None:
+            return self.async_create_entry(
+                title="",
+                data={**self._config_entry.options, **user_input},
+            )
+
+        options = self._config_entry.options
+        return self.async_show_form(
+            step_id="advanced",
+            data_schema=vol.Schema({
+                vol.Required(
+                    CONF_MAX_PAYLOAD_SIZE,
+                    default=options.get(CONF_MAX_PAYLOAD_SIZE, DEFAULT_MAX_PAYLOAD_SIZE),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=64)),
+                vol.Required(
+                    CONF_PARSE_OFFLOAD_SIZE,
+                    default=options.get(CONF_PARSE_OFFLOAD_SIZE, DEFAULT_PARSE_OFFLOAD_SIZE),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=65536)),
+                vol.Required(
+                    CONF_PARSE_PROCESSES,
+                    default=options.get(CONF_PARSE_PROCESSES, DEFAULT_PARSE_PROCESSES),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=MAX_PARSE_PROCESSES)),
+                vol.Required(
+                    CONF_FETCH_CONCURRENCY,
+                    # Options saved when more was allowed are shown capped
+                    default=min(
+                        options.get(CONF_FETCH_CONCURRENCY, DEFAULT_FETCH_CONCURRENCY),
+                        MAX_FETCH_CONCURRENCY,
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=MAX_FETCH_CONCURRENCY)),
+                vol.Required(
+                    CONF_PREFETCH_WEEKS,
+                    default=options.get(CONF_PREFETCH_WEEKS, DEFAULT_PREFETCH_WEEKS),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=MAX_PREFETCH_WEEKS)),
+            }),
+        )
+
     async def async_step_change_class(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
@@ -768,6 +829,7 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
             return self.async_create_entry(
                 title=new_title,
                 data={
+                    **self._kept_options(),
                     CONF_CLASS_NAME: self._new_class_name,
                     CONF_EXCLUDED_SUBJECTS: current_excluded,
                 },
@@ -788,6 +850,7 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                     username=self._config_entry.data[CONF_USERNAME],
                     password=self._config_entry.data[CONF_PASSWORD],
                     base_url=base_url,
+                    transport=async_get_transport(self.hass),
                 )
                 self._available_classes = await api.async_get_classes()
                 await api.async_close()
@@ -828,51 +891,10 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                 username=self._config_entry.data[CONF_USERNAME],
                 password=self._config_entry.data[CONF_PASSWORD],
                 base_url=base_url,
+                transport=async_get_transport(self.hass),
             )
-            all_subjects: set[str] = set()
-            today = date.today()
-            dates_to_check = [today + timedelta(days=i) for i in range(-7, 21)]
-
-            async def _fetch(check_date: date) -> set[str]:
-                found: set[str] = set()
-                try:
-                    schedule_data = await api.async_get_schedule(
-                        target_date=check_date,
-                        class_name=self._new_class_name,
-                    )
-                    for entry in (
-                        schedule_data.get("lessons", []) + schedule_data.get("changes", [])
-                    ):
-                        subject = (entry.get("subject") or "").strip()
-                        course  = (entry.get("course")  or "").strip()
-                        if (
-                            subject
-                            and not subject.startswith("KPL")
-                            and not subject.startswith("---")
-                            and not subject.startswith("Pause")
-                            and not subject.startswith("Mittagspause")
-                            and not subject.lower().startswith("frei")
-                            and 2 <= len(subject) <= 10
-                        ):
-                            found.add(subject)
-                        # Also include course (Ku2) so parallel groups can be deselected
-                        if (
-                            course
-                            and not course.startswith("KPL")
-                            and not course.startswith("---")
-                            and 2 <= len(course) <= 12
-                            and course != subject
-                        ):
-                            found.add(course)
-                except Exception:
-                    pass
-                return found
-
-            results = await asyncio.gather(*[_fetch(d) for d in dates_to_check])
-            for s in results:
-                all_subjects.update(s)
-
-            self._available_subjects = sorted(list(all_subjects))
+            catalog = await api.async_get_course_catalog()
+            self._available_subjects = _subject_choices(catalog, self._new_class_name)
             await api.async_close()
         except Exception as err:
             _LOGGER.error("Options flow: error fetching subjects: %s", err)
@@ -921,6 +943,7 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
             return self.async_create_entry(
                 title=new_title,
                 data={
+                    **self._kept_options(),
                     CONF_CLASS_NAME: self._new_class_name,
                     CONF_EXCLUDED_SUBJECTS: excluded,
                     CONF_SELECTED_COURSES: selected_courses,
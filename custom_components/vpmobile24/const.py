@@ -17,9 +17,51 @@ CONF_DEMO_MODE = "demo_mode"                # True wenn Demo-Modus aktiv
 
 # Default values
 DEFAULT_UPDATE_INTERVAL = 15  # minutes
+SERVER_PROBE_INTERVAL = 60    # minutes between download mirror probes
 DEFAULT_NAME = "VpMobile24"
 DEFAULT_BASE_URL = "https://www.stundenplan24.de"
 
+# Shared objects in hass.data[DOMAIN] (next to the per-entry coordinators)
+DATA_XML_CACHE = "xml_cache"
+DATA_TRANSPORT = "transport"
+DATA_PARSE_POOL = "parse_pool"
+
+# Advanced options (options flow → "Advanced settings"); carried over by every options step
+CONF_MAX_PAYLOAD_SIZE = "max_payload_size"  # MiB, larger downloads are aborted
+DEFAULT_MAX_PAYLOAD_SIZE = 8                # MiB (plans of large schools stay below 2 MiB)
+CONF_PARSE_OFFLOAD_SIZE = "parse_offload_size"  # KiB, larger files are parsed in a worker thread
+DEFAULT_PARSE_OFFLOAD_SIZE = 256            # KiB (0 = always use a worker thread)
+CONF_PARSE_PROCESSES = "parse_processes"    # worker processes instead of threads (0 = off)
+DEFAULT_PARSE_PROCESSES = 0
+MAX_PARSE_PROCESSES = 8
+CONF_FETCH_CONCURRENCY = "fetch_concurrency"  # plan dates downloaded at the same time
+DEFAULT_FETCH_CONCURRENCY = 4
+# More would only queue: the transport never sends more than
+# transport.HTTP_LIMIT_PER_HOST requests to one server at a time
+MAX_FETCH_CONCURRENCY = 4
+CONF_PREFETCH_WEEKS = "prefetch_weeks"      # weeks after the current one loaded in the background
+DEFAULT_PREFETCH_WEEKS = 2
+MAX_PREFETCH_WEEKS = 4
+ADVANCED_OPTIONS = (
+    CONF_MAX_PAYLOAD_SIZE,
+    CONF_PARSE_OFFLOAD_SIZE,
+    CONF_PARSE_PROCESSES,
+    CONF_FETCH_CONCURRENCY,
+    CONF_PREFETCH_WEEKS,
+)
+
+# Event loop responsiveness during updates (see metrics.LoopLagMonitor)
+LOOP_LAG_SAMPLE_INTERVAL = 0.01   # seconds between samples (= resolution of the measurement)
+LOOP_LAG_WARNING = 0.5            # seconds; a longer single stall is logged as a warning
+
+# Directory below <config>/.storage for the persistent raw XML cache
+XML_CACHE_DIR = "vpmobile24_xml"
+
+# Store of the last published data of each entry (key + ".<entry_id>", see snapshot.py)
+SNAPSHOT_STORAGE_KEY = "vpmobile24.snapshot"
+SNAPSHOT_STORAGE_VERSION = 1
+SNAPSHOT_SAVE_DELAY = 10          # seconds; updates within this time are written once
+
 # Configuration key for the download server
 CONF_SERVER = "server"
 
@@ -4,6 +4,8 @@ from __future__ import annotations
 from datetime import date, timedelta, datetime
 from typing import Any
 
+from .models import Lesson, PeriodGrid, parse_minutes
+
 # ── Stundenzeiten ─────────────────────────────────────────────────────────────
 _TIMES = {
     1: ("07:45", "08:30"),
@@ -16,28 +18,34 @@ _TIMES = {
     8: ("14:35", "15:20"),
 }
 
+# The same times as the school's period grid parsed from <KlStunden>
+DEMO_PERIOD_GRID = PeriodGrid({
+    period: (parse_minutes(start), parse_minutes(end))
+    for period, (start, end) in _TIMES.items()
+})
+
 _DAYS_DE = ["Montag", "Dienstag", "Mittwoch", "Donnerstag", "Freitag"]
 
 def _lesson(period: int, subject: str, teacher: str, room: str, cls: str,
             is_change: bool = False, info: str = "", cancelled: bool = False,
-            target_date: date | None = None) -> dict[str, Any]:
+            target_date: date | None = None) -> Lesson:
     t_start, t_end = _TIMES.get(period, ("", ""))
-    return {
-        "class": cls,
-        "period": str(period),
-        "time_start": t_start,
-        "time_end": t_end,
-        "time": f"{t_start}-{t_end}" if t_start else f"{period}. Stunde",
-        "subject": "" if cancelled else subject,
-        "teacher": teacher,
-        "room": room,
-        "course": "",
-        "info": info,
-        "is_change": is_change or cancelled,
-        "nr": str(period),
-        "date": (target_date or date.today()).isoformat(),
-        "day_name": _DAYS_DE[target_date.weekday()] if target_date else "",
-    }
+    return Lesson(
+        class_name=cls,
+        period=str(period),
+        time_start=t_start,
+        time_end=t_end,
+        time=f"{t_start}-{t_end}" if t_start else f"{period}. Stunde",
+        subject="" if cancelled else subject,
+        teacher=teacher,
+        room=room,
+        course="",
+        info=info,
+        is_change=is_change or cancelled,
+        nr=str(period),
+        date=(target_date or date.today()).isoformat(),
+        day_name=_DAYS_DE[target_date.weekday()] if target_date else "",
+    )
 
 
 def _get_week_monday(offset: int = 0) -> date:
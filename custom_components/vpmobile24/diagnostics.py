@@ -1,11 +1,32 @@
 from homeassistant.components.diagnostics import async_redact_data
 
+from .const import DOMAIN
+from .models import PeriodGrid
+from .xml_backend import BACKEND
+
 TO_REDACT = {"password", "token"}
 
+
+def _servers(coordinator):
+    servers = getattr(getattr(coordinator, "api", None), "servers", None)
+    if servers is None:
+        return {}
+    return {
+        "configured": servers.configured,
+        "active": servers.active,
+        "stats": {base_url: stats.as_dict() for base_url, stats in servers.stats.items()},
+    }
+
 async def async_get_config_entry_diagnostics(hass, config_entry):
+    coordinator = hass.data.get(DOMAIN, {}).get(config_entry.entry_id)
     return async_redact_data(
         {
             "entry": config_entry.as_dict(),
+            "xml_backend": BACKEND,
+            "last_update": getattr(coordinator, "update_stats", {}),
+            "startup": getattr(coordinator, "startup_stats", {}),
+            "period_grid": getattr(coordinator, "period_grid", PeriodGrid()).as_dict(),
+            "servers": _servers(coordinator),
         },
         TO_REDACT,
     )
\ No newline at end of file
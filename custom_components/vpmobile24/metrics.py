@@ -0,0 +1,78 @@
+"""Event loop responsiveness measurement for VpMobile24 updates.
+
+Parsing a large plan on the event loop stalls every other integration.
+``LoopLagMonitor`` makes such stalls visible: while it runs, a callback is
+scheduled every few milliseconds, and how late it actually runs is time in
+which the loop was blocked (by this integration or by anything else).
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any
+
+from .const import LOOP_LAG_SAMPLE_INTERVAL
+
+
+class LoopLagMonitor:
+    """Measures event loop blocking between ``start()`` and ``stop()``."""
+
+    __slots__ = (
+        "_interval",
+        "_loop",
+        "_handle",
+        "_due",
+        "_started",
+        "duration",
+        "max_lag",
+        "total_lag",
+    )
+
+    def __init__(self, interval: float = LOOP_LAG_SAMPLE_INTERVAL) -> None:
+        """Initialize a stopped monitor sampling every ``interval`` seconds."""
+        self._interval = interval
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._handle: asyncio.TimerHandle | None = None
+        self._due = 0.0
+        self._started = 0.0
+        self.duration = 0.0     # seconds between start() and stop()
+        self.max_lag = 0.0      # longest single stall in seconds
+        self.total_lag = 0.0    # sum of all stalls in seconds
+
+    def start(self) -> None:
+        """Start sampling; must be called from the event loop."""
+        self._loop = asyncio.get_running_loop()
+        self._started = time.monotonic()
+        self.max_lag = self.total_lag = 0.0
+        self._schedule()
+
+    def stop(self) -> None:
+        """Stop sampling; the results stay available."""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+            # A stall that is still going on when the update ends counts too
+            self._record(self._loop.time() - self._due)
+        self.duration = time.monotonic() - self._started
+
+    def _schedule(self) -> None:
+        self._due = self._loop.time() + self._interval
+        self._handle = self._loop.call_at(self._due, self._tick)
+
+    def _tick(self) -> None:
+        self._record(self._loop.time() - self._due)
+        self._schedule()
+
+    def _record(self, lag: float) -> None:
+        if lag <= 0:
+            return
+        self.total_lag += lag
+        self.max_lag = max(self.max_lag, lag)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a summary for diagnostics."""
+        return {
+            "duration_ms": round(self.duration * 1000),
+            "loop_max_lag_ms": round(self.max_lag * 1000, 1),
+            "loop_total_lag_ms": round(self.total_lag * 1000, 1),
+        }
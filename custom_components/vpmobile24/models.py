@@ -0,0 +1,446 @@
+"""Parsed plan data of VpMobile24.
+
+A ``PlanKl<date>.xml`` file always contains the plan of the whole school.
+``SchoolPlan`` keeps all of it, indexed by class, teacher and room, so the
+file is parsed once and every class or teacher view is a cheap projection.
+Single lessons are compact ``Lesson`` records instead of dicts.
+"""
+from __future__ import annotations
+
+import functools
+import sys
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from operator import attrgetter
+from datetime import date, datetime
+from typing import Any
+
+# Lesson key → attribute of the Lesson record ("class" is a keyword)
+_LESSON_SLOTS: dict[str, str] = {
+    "class": "class_name",
+    "period": "period",
+    "time_start": "time_start",
+    "time_end": "time_end",
+    "time": "time",
+    "subject": "subject",
+    "teacher": "teacher",
+    "room": "room",
+    "course": "course",
+    "info": "info",
+    "is_change": "is_change",
+    "nr": "nr",
+    # Only set on dated copies made by the coordinator (see Lesson.replace)
+    "date": "date",
+    "day_name": "day_name",
+}
+_OPTIONAL_KEYS = frozenset({"date", "day_name"})
+
+# Sort position of lessons without a numeric period or start time
+_UNKNOWN_SORT_VALUE = 999
+
+
+@functools.lru_cache(maxsize=1024)
+def parse_minutes(value: str) -> int | None:
+    """Return minutes since midnight for an ``"HH:MM"`` string, or None.
+
+    Cached: a school only uses a handful of distinct times, and lessons with
+    the same time then share one int object.
+    """
+    if not value or ":" not in value:
+        return None
+    try:
+        hours, minutes = map(int, value.split(":"))
+    except (ValueError, TypeError):
+        return None
+    return hours * 60 + minutes
+
+
+def format_minutes(minutes: int) -> str:
+    """Return minutes since midnight as an ``"HH:MM"`` string."""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+@functools.lru_cache(maxsize=256)
+def parse_period(value: str) -> int | None:
+    """Return a period number as int, or None if it is not numeric."""
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return None
+
+
+class Lesson(Mapping):
+    """One lesson of a plan, read like the lesson dicts it replaces.
+
+    ``lesson["subject"]``, ``lesson.get("date", "")``, ``"info" in lesson``
+    and ``dict(lesson)`` behave as before. Records are shared between the
+    cached plan and every view of it, so they are never modified: ``copy()``
+    returns a plain dict for callers that add their own keys, ``replace()`` a
+    new record. Short, highly repetitive strings (class, subject, teacher,
+    room, ...) are interned, so each distinct value exists only once.
+
+    The numeric forms of the times and the period are computed once here:
+    ``start_min``/``end_min`` (minutes since midnight), ``period_num`` (all
+    None when not parseable) and ``sort_key`` for ``sort_lessons``.
+    """
+
+    __slots__ = (
+        *_LESSON_SLOTS.values(),
+        "start_min",
+        "end_min",
+        "period_num",
+        "sort_key",
+    )
+
+    def __init__(
+        self,
+        class_name: str = "",
+        period: str = "",
+        time_start: str = "",
+        time_end: str = "",
+        time: str = "",
+        subject: str = "",
+        teacher: str = "",
+        room: str = "",
+        course: str = "",
+        info: str = "",
+        is_change: bool = False,
+        nr: str = "",
+        date: str | None = None,
+        day_name: str | None = None,
+    ) -> None:
+        """Initialize the record, interning the short string fields."""
+        intern = sys.intern
+        self.class_name = intern(class_name)
+        self.period = intern(period)
+        self.time_start = intern(time_start)
+        self.time_end = intern(time_end)
+        self.time = intern(time)
+        self.subject = intern(subject)
+        self.teacher = intern(teacher)
+        self.room = intern(room)
+        self.course = intern(course)
+        self.info = info
+        self.is_change = is_change
+        self.nr = intern(nr)
+        self.date = date
+        self.day_name = day_name
+        self.start_min = parse_minutes(time_start)
+        self.end_min = parse_minutes(time_end)
+        self.period_num = parse_period(period)
+        self.sort_key = (
+            _UNKNOWN_SORT_VALUE if self.period_num is None else self.period_num,
+            self.class_name,
+            _UNKNOWN_SORT_VALUE if self.start_min is None else self.start_min,
+        )
+
+    def __getitem__(self, key: str) -> Any:
+        """Return a field by its dict key."""
+        slot = _LESSON_SLOTS.get(key)
+        if slot is None:
+            raise KeyError(key)
+        value = getattr(self, slot)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return a field by its dict key, or ``default`` if it is not set."""
+        slot = _LESSON_SLOTS.get(key)
+        if slot is None:
+            return default
+        value = getattr(self, slot)
+        return default if value is None else value
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the keys that are set."""
+        for key, slot in _LESSON_SLOTS.items():
+            if key not in _OPTIONAL_KEYS or getattr(self, slot) is not None:
+                yield key
+
+    def __len__(self) -> int:
+        """Return the number of keys that are set."""
+        return len(_LESSON_SLOTS) - (self.date is None) - (self.day_name is None)
+
+    def __repr__(self) -> str:
+        """Return a dict-like representation."""
+        return f"Lesson({dict(self)!r})"
+
+    def __reduce__(self) -> tuple[type[Lesson], tuple[Any, ...]]:
+        """Pickle as the constructor arguments (re-interned when loaded)."""
+        return (Lesson, self.as_row())
+
+    def as_row(self) -> tuple[Any, ...]:
+        """Return the constructor arguments in order; ``Lesson(*row)`` restores it."""
+        return (
+            self.class_name, self.period, self.time_start, self.time_end,
+            self.time, self.subject, self.teacher, self.room, self.course,
+            self.info, self.is_change, self.nr, self.date, self.day_name,
+        )
+
+    def copy(self) -> dict[str, Any]:
+        """Return the lesson as a new, mutable plain dict."""
+        return dict(self)
+
+    def replace(self, **changes: Any) -> Lesson:
+        """Return a new record with the given fields (by dict key) replaced."""
+        fields = {_LESSON_SLOTS[key]: self[key] for key in self}
+        for key, value in changes.items():
+            fields[_LESSON_SLOTS[key]] = value
+        return Lesson(**fields)
+
+
+def sort_lessons(lessons: list[Lesson]) -> list[Lesson]:
+    """Sort lessons by period, class, then start time."""
+    return sorted(lessons, key=attrgetter("sort_key"))
+
+
+class PeriodGrid:
+    """The period times of a school, from the <KlStunden> of a plan file.
+
+    Kept as parallel arrays sorted by period (schools number their periods
+    in time order), so looking up the times of a period or the period at a
+    time of day is a bisect. An empty grid (no <KlStunden> seen) is falsy.
+    """
+
+    __slots__ = ("periods", "starts", "ends")
+
+    def __init__(self, times: Mapping[int, tuple[int, int]] | None = None) -> None:
+        """Initialize from period → (start, end) in minutes since midnight.
+
+        Periods that start before the one before them are left out, so the
+        start times stay sorted.
+        """
+        self.periods: list[int] = []
+        self.starts: list[int] = []
+        self.ends: list[int] = []
+        for period, (start, end) in sorted((times or {}).items()):
+            if self.starts and start < self.starts[-1]:
+                continue
+            self.periods.append(period)
+            self.starts.append(start)
+            self.ends.append(end)
+
+    def __bool__(self) -> bool:
+        """Return whether the grid has any period."""
+        return bool(self.periods)
+
+    def __len__(self) -> int:
+        """Return the number of periods."""
+        return len(self.periods)
+
+    def __repr__(self) -> str:
+        """Return the periods and their times."""
+        return f"PeriodGrid({self.as_dict()!r})"
+
+    def times(self, period: int) -> tuple[int, int] | None:
+        """Return (start, end) of ``period`` in minutes, or None if unknown."""
+        i = bisect_left(self.periods, period)
+        if i < len(self.periods) and self.periods[i] == period:
+            return self.starts[i], self.ends[i]
+        return None
+
+    def period_at(self, minutes: int) -> int | None:
+        """Return the period running at ``minutes`` since midnight.
+
+        Between two periods (and before the first) the next period is
+        returned; None after the end of the last one.
+        """
+        i = bisect_right(self.starts, minutes) - 1
+        if i >= 0 and minutes < self.ends[i]:
+            return self.periods[i]
+        if i + 1 < len(self.periods):
+            return self.periods[i + 1]
+        return None
+
+    def periods_after(self, minutes: int) -> list[int]:
+        """Return the periods that start after ``minutes`` since midnight."""
+        return self.periods[bisect_right(self.starts, minutes):]
+
+    def as_rows(self) -> list[tuple[int, int, int]]:
+        """Return ``(period, start, end)`` rows; ``from_rows`` restores the grid."""
+        return list(zip(self.periods, self.starts, self.ends))
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Sequence[int]]) -> PeriodGrid:
+        """Rebuild a grid from ``as_rows()`` output (JSON turns rows into lists)."""
+        return cls({period: (start, end) for period, start, end in rows})
+
+    def as_dict(self) -> dict[int, str]:
+        """Return period → ``"HH:MM-HH:MM"`` for attributes and diagnostics."""
+        return {
+            period: f"{format_minutes(start)}-{format_minutes(end)}"
+            for period, start, end in zip(self.periods, self.starts, self.ends)
+        }
+
+
+class SchoolPlan:
+    """All lessons of one plan date, indexed by class, teacher and room."""
+
+    __slots__ = (
+        "date",
+        "timestamp",
+        "additional_info",
+        "last_updated",
+        "by_class",
+        "unterricht",
+        "by_teacher",
+        "by_room",
+        "period_grid",
+        "courses",
+    )
+
+    def __init__(self, plan_date: date) -> None:
+        """Initialize an empty plan; filled by the parser via ``add_class``."""
+        self.date = plan_date
+        self.timestamp = ""
+        self.additional_info: list[dict[str, str]] = []
+        self.last_updated = datetime.now().isoformat()
+        # Class → all its lessons in document order
+        self.by_class: dict[str, list[Lesson]] = {}
+        # Class → lesson numbers (UeNr) of its <Unterricht> block
+        self.unterricht: dict[str, set[str]] = {}
+        # Upper-case teacher abbreviation / room → lessons in document order
+        self.by_teacher: dict[str, list[Lesson]] = {}
+        self.by_room: dict[str, list[Lesson]] = {}
+        # Period times of the school; set by the parser when the file is done
+        self.period_grid = PeriodGrid()
+        # Class → (subject, teacher, group) of each <Ue> in its <Unterricht>
+        self.courses: dict[str, list[tuple[str, str, str]]] = {}
+
+    def add_class(
+        self,
+        class_name: str,
+        lessons: list[Lesson],
+        unterricht_nrs: set[str],
+        courses: list[tuple[str, str, str]] | None = None,
+    ) -> None:
+        """Add the lessons and courses of one <Kl> element and index them."""
+        self.by_class.setdefault(class_name, []).extend(lessons)
+        self.unterricht.setdefault(class_name, set()).update(unterricht_nrs)
+        if courses:
+            self.courses.setdefault(class_name, []).extend(courses)
+        for lesson in lessons:
+            teacher = lesson.teacher.strip().upper()
+            self.by_teacher.setdefault(teacher, []).append(lesson)
+            room = lesson.room.strip()
+            if room:
+                self.by_room.setdefault(room, []).append(lesson)
+
+    @property
+    def classes(self) -> list[str]:
+        """Class abbreviations in document order."""
+        return list(self.by_class)
+
+    @property
+    def teachers(self) -> list[str]:
+        """Sorted abbreviations of all teachers with a lesson on this date."""
+        return sorted({
+            lesson.teacher.strip()
+            for lessons in self.by_class.values()
+            for lesson in lessons
+            if lesson.teacher.strip()
+        })
+
+    def lessons_for_class(self, class_name: str) -> list[Lesson]:
+        """Lessons of a class that belong to its own <Unterricht> block.
+
+        Lessons of parallel groups whose number is not listed there are left
+        out; without an <Unterricht> block every lesson is kept.
+        """
+        nrs = self.unterricht.get(class_name)
+        lessons = self.by_class.get(class_name, [])
+        if not nrs:
+            return list(lessons)
+        return [lesson for lesson in lessons if not lesson.nr or lesson.nr in nrs]
+
+    def lessons_for_teacher(self, teacher_short: str) -> list[Lesson]:
+        """Lessons of a teacher across all classes."""
+        return list(self.by_teacher.get(teacher_short.upper(), []))
+
+    def lessons_for_room(self, room: str) -> list[Lesson]:
+        """Lessons taking place in a room across all classes."""
+        return list(self.by_room.get(room, []))
+
+    def schedule(
+        self,
+        class_name: str | None = None,
+        teacher_short: str | None = None,
+    ) -> dict[str, Any]:
+        """Return the schedule dict of one class or one teacher.
+
+        With ``teacher_short`` the lessons of that teacher in all classes are
+        returned; otherwise those of ``class_name`` (or of every class when it
+        is None). Lessons are split into regular ones and changes and sorted.
+        """
+        if teacher_short:
+            classes = self.classes
+            selected = self.lessons_for_teacher(teacher_short)
+        else:
+            if teacher_short is not None or class_name is None:
+                classes = self.classes
+            else:
+                classes = [class_name] if class_name in self.by_class else []
+            selected = [
+                lesson for name in classes for lesson in self.lessons_for_class(name)
+            ]
+
+        lessons: list[Lesson] = []
+        changes: list[Lesson] = []
+        for lesson in selected:
+            (changes if lesson.is_change else lessons).append(lesson)
+
+        return {
+            "date": self.date.isoformat(),
+            "lessons": sort_lessons(lessons),
+            "changes": sort_lessons(changes),
+            "additional_info": list(self.additional_info),
+            "last_updated": self.last_updated,
+            "timestamp": self.timestamp,
+            "classes": classes,
+        }
+
+
+class CourseCatalog:
+    """Subjects, course groups and teachers of every class of a school.
+
+    The <Unterricht> block of a class lists all its courses, whichever day
+    they are on, so a single plan file is enough to build the catalog; the
+    lessons of that plan are added for subjects without a course entry.
+    """
+
+    __slots__ = ("plan_date", "subjects", "courses", "teachers")
+
+    def __init__(self, plan_date: date | None = None) -> None:
+        """Initialize an empty catalog (no plan file found)."""
+        self.plan_date = plan_date
+        # Class → subjects / course groups (Ku2, UeGr)
+        self.subjects: dict[str, set[str]] = {}
+        self.courses: dict[str, set[str]] = {}
+        # Abbreviations of all teachers of the school
+        self.teachers: set[str] = set()
+
+    @classmethod
+    def from_plan(cls, plan: SchoolPlan) -> CourseCatalog:
+        """Build the catalog from a parsed plan file."""
+        catalog = cls(plan.date)
+        for class_name in plan.classes:
+            subjects = catalog.subjects.setdefault(class_name, set())
+            courses = catalog.courses.setdefault(class_name, set())
+            for subject, teacher, group in plan.courses.get(class_name, ()):
+                subjects.add(subject)
+                if group:
+                    courses.add(group)
+                if teacher:
+                    catalog.teachers.add(teacher)
+            for lesson in plan.lessons_for_class(class_name):
+                if lesson.subject.strip():
+                    subjects.add(lesson.subject.strip())
+                if lesson.course.strip():
+                    courses.add(lesson.course.strip())
+        catalog.teachers.update(plan.teachers)
+        return catalog
+
+    def __bool__(self) -> bool:
+        """Return whether any class has a subject."""
+        return any(self.subjects.values())
@@ -0,0 +1,148 @@
+"""Optional process pool for parsing plan files.
+
+ElementTree holds the GIL while it parses, so with many config entries of
+several schools the plan files of one update cycle are parsed one after the
+other on a single core, whether on the event loop or in worker threads. In
+process-pool mode (advanced option "parse_processes") large files are sent
+as raw bytes to worker processes instead; ``Lesson`` records pickle to
+compact tuples and are rebuilt (and their strings interned) on the way back.
+
+The pool is shared by all config entries, sized by the entry that set it up
+or changed its "parse_processes" option last, and shut down when the last
+entry that uses it is unloaded or HA stops.
+Workers are started with the "spawn" method, so they never inherit the
+state (threads, sockets, locks) of the running Home Assistant process.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import TYPE_CHECKING, Any, TypeVar
+
+from .const import DATA_PARSE_POOL, DOMAIN
+
+if TYPE_CHECKING:
+    from homeassistant.core import Event, HomeAssistant
+
+_LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+# Files waiting for or being parsed, per worker process; further callers wait
+QUEUE_DEPTH_PER_PROCESS = 2
+
+
+class ParsePool:
+    """Worker processes for parsing, with a bounded queue."""
+
+    def __init__(self, processes: int) -> None:
+        """Initialize the pool; the processes are started on first use."""
+        self.processes = processes
+        self.users: set[str] = set()
+        # Removes the listener that shuts the pool down when HA stops
+        self.remove_stop_listener: Callable[[], None] | None = None
+        self._executor: ProcessPoolExecutor | None = None
+        self._slots = asyncio.Semaphore(processes * QUEUE_DEPTH_PER_PROCESS)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def async_run(self, func: Callable[..., _T], *args: Any) -> _T:
+        """Run ``func(*args)`` in a worker process.
+
+        ``func``, its arguments and its result must be picklable. If the
+        pool broke (a worker died), it is restarted for the next call and
+        this call falls back to a thread of HA's executor.
+        """
+        loop = asyncio.get_running_loop()
+        async with self._slots:
+            executor = self._get_executor()
+            try:
+                return await loop.run_in_executor(executor, func, *args)
+            except BrokenProcessPool:
+                _LOGGER.warning("VpMobile24: parse worker died, restarting the pool")
+                if self._executor is executor:
+                    self._executor = None
+                    executor.shutdown(wait=False)
+        return await loop.run_in_executor(None, func, *args)
+
+    def resize(self, processes: int) -> None:
+        """Use ``processes`` worker processes from the next job on.
+
+        Jobs already running finish in the old processes, which exit then.
+        """
+        if processes == self.processes:
+            return
+        self.processes = processes
+        self._slots = asyncio.Semaphore(processes * QUEUE_DEPTH_PER_PROCESS)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def shutdown(self) -> None:
+        """Stop the worker processes; jobs not started yet are cancelled."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def async_acquire_parse_pool(
+    hass: HomeAssistant, entry_id: str, processes: int
+) -> ParsePool | None:
+    """Return the shared pool for ``entry_id``, or None with ``processes`` 0.
+
+    Must be called from the event loop. Releases a pool the entry held
+    before when process-pool mode was switched off, and resizes the pool
+    when ``processes`` differs from its current size.
+    """
+    if processes <= 0:
+        async_release_parse_pool(hass, entry_id)
+        return None
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    pool = domain_data.get(DATA_PARSE_POOL)
+    if pool is None:
+        from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+        from homeassistant.core import callback
+
+        pool = domain_data[DATA_PARSE_POOL] = ParsePool(processes)
+
+        @callback
+        def _async_shutdown(_event: Event) -> None:
+            # A once-listener is removed before it is called
+            pool.remove_stop_listener = None
+            pool.shutdown()
+
+        pool.remove_stop_listener = hass.bus.async_listen_once(
+            EVENT_HOMEASSISTANT_STOP, _async_shutdown
+        )
+        _LOGGER.debug("VpMobile24: parse pool with %d processes created", processes)
+    elif pool.processes != processes:
+        pool.resize(processes)
+        _LOGGER.debug("VpMobile24: parse pool resized to %d processes", processes)
+    pool.users.add(entry_id)
+    return pool
+
+
+def async_release_parse_pool(hass: HomeAssistant, entry_id: str) -> None:
+    """Release the entry's use of the pool; shut it down if nobody is left."""
+    domain_data = hass.data.get(DOMAIN, {})
+    pool = domain_data.get(DATA_PARSE_POOL)
+    if pool is None:
+        return
+    pool.users.discard(entry_id)
+    if not pool.users:
+        if pool.remove_stop_listener is not None:
+            pool.remove_stop_listener()
+            pool.remove_stop_listener = None
+        pool.shutdown()
+        del domain_data[DATA_PARSE_POOL]
+        _LOGGER.debug("VpMobile24: parse pool shut down")
@@ -0,0 +1,105 @@
+"""Background prefetch of plan dates ahead of the coordinator.
+
+A coordinator update only fetches what its sensors publish (today and the
+rest of the current week). The following weeks, which the week table and
+the calendar show, are loaded afterwards by ``PrefetchScheduler``: one date
+at a time, nearest first, paused while the coordinator updates, so today's
+data is never held up by downloads that are only needed later. After setup
+the scheduler also loads the rest of the current week: the first refresh
+only waits for today (see ``VpMobile24DataUpdateCoordinator``).
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable, Iterable
+from datetime import date
+from typing import TYPE_CHECKING
+
+from .api_new import CircuitOpenError, PlanNotPublishedError
+
+if TYPE_CHECKING:
+    from homeassistant.config_entries import ConfigEntry
+    from homeassistant.core import HomeAssistant
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class PrefetchScheduler:
+    """Fetches queued plan dates in a background task, nearest first."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        name: str,
+        fetch: Callable[[date], Awaitable[None]],
+        on_done: Callable[[list[date]], None],
+    ) -> None:
+        """Initialize an idle scheduler.
+
+        The background task is one of ``entry``'s, so it ends when the entry
+        is unloaded. ``fetch`` loads and stores one date; ``on_done`` is called
+        with the dates that were fetched whenever the queue has been worked off.
+        """
+        self._hass = hass
+        self._entry = entry
+        self._name = name
+        self._fetch = fetch
+        self._on_done = on_done
+        self._queue: list[date] = []
+        self._task: asyncio.Task | None = None
+        # Cleared while foreground work (a coordinator update) is running
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    @property
+    def pending(self) -> int:
+        """Number of dates still waiting to be fetched."""
+        return len(self._queue)
+
+    def pause(self) -> None:
+        """Hold back further fetches until ``resume()``; one in progress finishes."""
+        self._idle.clear()
+
+    def resume(self) -> None:
+        """Let paused fetches continue."""
+        self._idle.set()
+
+    def schedule(self, dates: Iterable[date]) -> None:
+        """Replace the queue with ``dates`` and start fetching in the background."""
+        today = date.today()
+        self._queue = sorted(set(dates), key=lambda day: (abs((day - today).days), day))
+        if self._queue and (self._task is None or self._task.done()):
+            self._task = self._entry.async_create_background_task(
+                self._hass, self._async_run(), self._name
+            )
+
+    def cancel(self) -> None:
+        """Stop fetching (config entry unloaded)."""
+        self._queue = []
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _async_run(self) -> None:
+        fetched: list[date] = []
+        while True:
+            await self._idle.wait()
+            if not self._queue:
+                break
+            day = self._queue.pop(0)
+            try:
+                await self._fetch(day)
+            except PlanNotPublishedError:
+                continue
+            except CircuitOpenError as err:
+                _LOGGER.debug("VpMobile24: prefetch stopped: %s", err)
+                self._queue = []
+                break
+            except Exception as err:  # noqa: BLE001 - one date must not stop the others
+                _LOGGER.debug("VpMobile24: could not pre-fetch %s: %s", day, err)
+                continue
+            fetched.append(day)
+            _LOGGER.debug("VpMobile24: pre-fetched %s", day)
+        self._on_done(fetched)
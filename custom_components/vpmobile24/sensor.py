@@ -12,6 +12,8 @@ from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import DOMAIN
+from .models import Lesson, format_minutes
+from .transport import async_get_transport
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -166,16 +168,12 @@ class VpMobile24NextLessonSensor(CoordinatorEntity, SensorEntity):
             return {"status": STATE_MESSAGES[self._language]["no_lessons_today"]}
         # Calculate countdown
         countdown_min = None
-        time_start = lesson.get("time_start", "")
-        if time_start and ":" in time_start:
-            try:
-                now = datetime.now()
-                h, m = map(int, time_start.split(":"))
-                lesson_dt = now.replace(hour=h, minute=m, second=0, microsecond=0)
-                diff = int((lesson_dt - now).total_seconds() / 60)
-                countdown_min = max(0, diff)
-            except (ValueError, TypeError):
-                pass
+        if lesson.start_min is not None:
+            now = datetime.now()
+            h, m = divmod(lesson.start_min, 60)
+            lesson_dt = now.replace(hour=h, minute=m, second=0, microsecond=0)
+            diff = int((lesson_dt - now).total_seconds() / 60)
+            countdown_min = max(0, diff)
         attrs = {
             "fach": lesson.get("subject", ""),
             "zeit": lesson.get("time", ""),
@@ -198,7 +196,7 @@ class VpMobile24NextLessonSensor(CoordinatorEntity, SensorEntity):
                 attrs["countdown_text"] = f"in {h}h {m}min" if m else f"in {h}h"
         return attrs
 
-    def _get_next_lesson(self) -> dict[str, Any] | None:
+    def _get_next_lesson(self) -> Lesson | None:
         if not self.coordinator.data:
             return None
         # Include both regular lessons and substitutions (changes)
@@ -207,30 +205,20 @@ class VpMobile24NextLessonSensor(CoordinatorEntity, SensorEntity):
             self.coordinator.data.get("changes", [])
         )
         now = datetime.now()
-        today = now.date()
-        candidates = []
+        today = now.date().isoformat()
+        now_mins = now.hour * 60 + now.minute
+        next_lesson = None
         for lesson in all_lessons:
-            date_str = lesson.get("date", "")
-            time_start = lesson.get("time_start", "")
-            subject = lesson.get("subject", "")
-            if not date_str or not time_start or ":" not in time_start:
+            start = lesson.start_min
+            if start is None or start <= now_mins or lesson.date != today:
                 continue
             # Skip cancelled lessons as "next lesson"
+            subject = lesson.subject
             if not subject or subject.strip() in ["\u2014", "---", "", "-", " "]:
                 continue
-            try:
-                if datetime.fromisoformat(date_str).date() != today:
-                    continue
-                h, m = map(int, time_start.split(":"))
-                lesson_dt = now.replace(hour=h, minute=m, second=0, microsecond=0)
-                if lesson_dt > now:
-                    candidates.append((lesson_dt, lesson))
-            except (ValueError, TypeError):
-                continue
-        if candidates:
-            candidates.sort(key=lambda x: x[0])
-            return candidates[0][1]
-        return None
+            if next_lesson is None or start < next_lesson.start_min:
+                next_lesson = lesson
+        return next_lesson
 
 
 class VpMobile24WeekScheduleSensor(CoordinatorEntity, SensorEntity):
@@ -278,11 +266,12 @@ class VpMobile24WeekScheduleSensor(CoordinatorEntity, SensorEntity):
             item for item in lessons + changes
             if item.get("date") == today
         ]
-        all_today.sort(key=lambda x: int(x.get("period", "0")) if str(x.get("period", "0")).isdigit() else 0)
+        all_today.sort(key=lambda x: x.period_num if x.period_num is not None else 0)
         completed = self._complete_double_lessons(all_today)
+        now_mins = now.hour * 60 + now.minute
         subjects_count: dict[str, int] = {}
         today_lessons = []
-        for lesson in completed:
+        for lesson, is_double in completed:
             subj = lesson.get("subject", "")
             subjects_count[subj] = subjects_count.get(subj, 0) + 1
             info: dict[str, Any] = {
@@ -298,20 +287,12 @@ class VpMobile24WeekScheduleSensor(CoordinatorEntity, SensorEntity):
                 info["zusatzinfo"] = lesson["info"]
             if lesson.get("is_change"):
                 info["ist_vertretung"] = True
-            if lesson.get("ist_doppelstunde"):
+            if is_double:
                 info["ist_doppelstunde"] = True
-            time_start = lesson.get("time_start", "")
-            if time_start and ":" in time_start:
-                try:
-                    h, m = map(int, time_start.split(":"))
-                    lesson_dt = now.replace(hour=h, minute=m, second=0, microsecond=0)
-                    info["ist_vorbei"] = lesson_dt <= now
-                except (ValueError, TypeError):
-                    info["ist_vorbei"] = False
-            else:
-                info["ist_vorbei"] = False
+            info["ist_vorbei"] = (
+                lesson.start_min is not None and lesson.start_min <= now_mins
+            )
             today_lessons.append(info)
-        today_lessons.sort(key=lambda x: int(x.get("stunde", "0")) if str(x.get("stunde", "0")).isdigit() else 0)
         return {
             "stunden_heute": today_lessons,
             "faecher_anzahl": subjects_count,
@@ -321,72 +302,47 @@ class VpMobile24WeekScheduleSensor(CoordinatorEntity, SensorEntity):
             "letzte_aktualisierung": self.coordinator.data.get("timestamp", ""),
         }
 
-    def _complete_double_lessons(self, lessons: list) -> list:
-        """Ergänze fehlende Stunden für Doppelstunden."""
+    def _complete_double_lessons(self, lessons: list) -> list[tuple[Lesson, bool]]:
+        """Ergänze fehlende Stunden für Doppelstunden.
+
+        Returns ``(lesson, ist_doppelstunde)`` pairs. The times of an added
+        period come from the school's period grid.
+        """
         if not lessons:
-            return lessons
-        by_period: dict[int, dict] = {}
+            return []
+        grid = self.coordinator.period_grid
+        by_period: dict[int, Lesson] = {}
         for lesson in lessons:
-            p = lesson.get("period", "")
-            if str(p).isdigit():
-                by_period[int(p)] = lesson
+            if lesson.period_num is not None and lesson.period_num >= 0:
+                by_period[lesson.period_num] = lesson
         if not by_period:
-            return lessons
+            return [(lesson, False) for lesson in lessons]
         result = []
         for period in range(min(by_period), max(by_period) + 1):
             if period in by_period:
-                result.append(by_period[period])
+                result.append((by_period[period], False))
                 continue
             prev = by_period.get(period - 1)
             nxt = by_period.get(period + 1)
-            if prev and prev.get("subject"):
-                nxt_check = by_period.get(period + 1)
-                if nxt_check and nxt_check.get("subject") != prev.get("subject"):
+            if prev is not None and prev.subject:
+                if nxt is not None and nxt.subject != prev.subject:
                     continue
-                double = prev.copy()
-                double["period"] = str(period)
-                ts = prev.get("time_start", "")
-                if ts and ":" in ts:
-                    try:
-                        h, m = map(int, ts.split(":"))
-                        m += 45
-                        if m >= 60:
-                            h += 1
-                            m -= 60
-                        s = f"{h:02d}:{m:02d}"
-                        em = m + 45
-                        e = f"{h:02d}:{em:02d}" if em < 60 else f"{h+1:02d}:{em-60:02d}"
-                        double["time_start"] = s
-                        double["time_end"] = e
-                        double["time"] = f"{s}-{e}"
-                    except (ValueError, TypeError):
-                        pass
-                double["ist_doppelstunde"] = True
-                result.append(double)
-            elif nxt and nxt.get("subject"):
-                prev_check = by_period.get(period - 1)
-                if prev_check and prev_check.get("subject") != nxt.get("subject"):
+                source = prev
+            elif nxt is not None and nxt.subject:
+                if prev is not None and prev.subject != nxt.subject:
                     continue
-                double = nxt.copy()
-                double["period"] = str(period)
-                ts = nxt.get("time_start", "")
-                if ts and ":" in ts:
-                    try:
-                        h, m = map(int, ts.split(":"))
-                        m -= 45
-                        if m < 0:
-                            h -= 1
-                            m += 60
-                        s = f"{h:02d}:{m:02d}"
-                        em = m + 45
-                        e = f"{h:02d}:{em:02d}" if em < 60 else f"{h+1:02d}:{em-60:02d}"
-                        double["time_start"] = s
-                        double["time_end"] = e
-                        double["time"] = f"{s}-{e}"
-                    except (ValueError, TypeError):
-                        pass
-                double["ist_doppelstunde"] = True
-                result.append(double)
+                source = nxt
+            else:
+                continue
+            changes: dict[str, str] = {"period": str(period)}
+            times = grid.times(period)
+            if times is not None:
+                s, e = format_minutes(times[0]), format_minutes(times[1])
+                changes.update(time_start=s, time_end=e, time=f"{s}-{e}")
+            else:
+                # Unknown period times — don't show those of the source lesson
+                changes.update(time_start="", time_end="", time=f"{period}. Stunde")
+            result.append((source.replace(**changes), True))
         return result
 
 
@@ -462,9 +418,7 @@ class VpMobile24WeekTableSensor(CoordinatorEntity, SensorEntity):
                 for lesson in day_data.get("lessons", []) + day_data.get("changes", []):
                     if not _should_include(lesson):
                         continue
-                    lesson_copy = lesson.copy()
-                    lesson_copy["date"] = date_str
-                    next_week_lessons.append(lesson_copy)
+                    next_week_lessons.append(lesson.replace(date=date_str))
 
         # Build next_next_week_table (offset=2)
         next_next_monday = next_monday + timedelta(weeks=1)
@@ -477,9 +431,7 @@ class VpMobile24WeekTableSensor(CoordinatorEntity, SensorEntity):
                 for lesson in day_data.get("lessons", []) + day_data.get("changes", []):
                     if not _should_include(lesson):
                         continue
-                    lesson_copy = lesson.copy()
-                    lesson_copy["date"] = date_str
-                    next_next_week_lessons.append(lesson_copy)
+                    next_next_week_lessons.append(lesson.replace(date=date_str))
 
         return {
             "week_table": self._create_week_table(all_lessons),
@@ -497,13 +449,13 @@ class VpMobile24WeekTableSensor(CoordinatorEntity, SensorEntity):
         table: dict = {day: {str(p): None for p in range(1, 11)} for day in weekdays}
         for lesson in all_lessons:
             date_str = lesson.get("date", "")
-            period = lesson.get("period", "")
-            if not date_str or not period:
+            period = lesson.period_num
+            if not date_str or period is None:
                 continue
             try:
                 wd = datetime.fromisoformat(date_str).weekday()
-                if 0 <= wd <= 4 and str(period).isdigit() and 1 <= int(period) <= 10:
-                    table[weekdays[wd]][period] = {
+                if 0 <= wd <= 4 and 1 <= period <= 10:
+                    table[weekdays[wd]][str(period)] = {
                         "fach": lesson.get("subject", ""),
                         "lehrer": lesson.get("teacher", ""),
                         "raum": lesson.get("room", ""),
@@ -733,17 +685,19 @@ class VpMobile24NextFreePeriodSensor(CoordinatorEntity, SensorEntity):
             return None
         today = datetime.now().date().isoformat()
         now = datetime.now()
+        now_mins = now.hour * 60 + now.minute
 
         # Build a dict of period -> lesson for today
-        today_lessons: dict[int, dict] = {}
+        today_lessons: dict[int, Lesson] = {}
         for lesson in self.coordinator.data.get("lessons", []):
-            if lesson.get("date") == today:
-                p = lesson.get("period", "")
-                if str(p).isdigit():
-                    today_lessons[int(p)] = lesson
-
-        # Walk periods 1â€“10, find first future free/cancelled slot
-        for period in range(1, 11):
+            if lesson.get("date") == today and lesson.period_num is not None:
+                today_lessons[lesson.period_num] = lesson
+
+        # Walk the periods still to start (1-10 without a period grid),
+        # find first future free/cancelled slot
+        grid = self.coordinator.period_grid
+        periods = grid.periods_after(now_mins) if grid else range(1, 11)
+        for period in periods:
             lesson = today_lessons.get(period)
             if lesson is None:
                 continue  # no entry at all â€” not a known free period
@@ -752,15 +706,8 @@ class VpMobile24NextFreePeriodSensor(CoordinatorEntity, SensorEntity):
             if not is_cancelled:
                 continue
             # Check if it's still in the future
-            ts = lesson.get("time_start", "")
-            if ts and ":" in ts:
-                try:
-                    h, m = map(int, ts.split(":"))
-                    lesson_dt = now.replace(hour=h, minute=m, second=0, microsecond=0)
-                    if lesson_dt <= now:
-                        continue  # already past
-                except (ValueError, TypeError):
-                    pass
+            if lesson.start_min is not None and lesson.start_min <= now_mins:
+                continue  # already past
             time_str = lesson.get("time", "")
             state = f"{period}. Stunde"
             if time_str:
@@ -824,7 +771,7 @@ class VpMobile24CurrentLessonSensor(CoordinatorEntity, SensorEntity):
             "datum": lesson.get("date", ""),
         }
 
-    def _get_current_lesson(self) -> dict[str, Any] | None:
+    def _get_current_lesson(self) -> Lesson | None:
         """Find the lesson currently running right now."""
         if not self.coordinator.data:
             return None
@@ -841,19 +788,10 @@ class VpMobile24CurrentLessonSensor(CoordinatorEntity, SensorEntity):
         for lesson in all_lessons:
             if lesson.get("date") != today:
                 continue
-            ts = lesson.get("time_start", "")
-            te = lesson.get("time_end", "")
-            if not ts or not te or ":" not in ts or ":" not in te:
-                continue
-            try:
-                sh, sm = map(int, ts.split(":"))
-                eh, em = map(int, te.split(":"))
-                start = sh * 60 + sm
-                end = eh * 60 + em
-                if start <= now_mins <= end:
-                    return lesson
-            except (ValueError, TypeError):
-                continue
+            start = lesson.start_min
+            end = lesson.end_min
+            if start is not None and end is not None and start <= now_mins <= end:
+                return lesson
         return None
 
 
@@ -1056,23 +994,21 @@ class VpMobile24HolidaySensor(SensorEntity):
             return
 
         try:
-            import aiohttp
             year = today.year
             all_holidays: list = []
-            headers = {"User-Agent": "VpMobile24-HA/2.5 (github.com/Maximilian-Andrew-Kluge/VpMobile24)"}
-
-            async with aiohttp.ClientSession(headers=headers) as session:
-                for y in [year, year + 1]:
-                    url = f"https://ferien-api.de/api/v1/holidays/{state_code}/{y}"
-                    try:
-                        async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as resp:
-                            if resp.status == 200:
-                                data = await resp.json()
-                                if isinstance(data, list):
-                                    all_holidays.extend(data)
-                            # On 429 or error: fallback already set above
-                    except Exception:
-                        pass
+            transport = async_get_transport(self.hass)
+
+            for y in [year, year + 1]:
+                url = f"https://ferien-api.de/api/v1/holidays/{state_code}/{y}"
+                try:
+                    async with transport.get(url, timeout=10) as resp:
+                        if resp.status == 200:
+                            data = await resp.json()
+                            if isinstance(data, list):
+                                all_holidays.extend(data)
+                        # On 429 or error: fallback already set above
+                except Exception:
+                    pass
 
             if all_holidays:
                 self._compute_holidays_from_data(all_holidays)
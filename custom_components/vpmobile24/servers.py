@@ -0,0 +1,263 @@
+"""Download server (mirror) health tracking for VpMobile24.
+
+stundenplan24 serves the same school data from www and the zusatz1–10
+mirrors. ``ServerPool`` keeps latency and success statistics for every
+mirror that is known to host the school and ranks them, so requests go to
+the fastest healthy server and fail over to the next one at runtime.
+
+Every server also has a circuit breaker: after a few failures in a row it
+opens and requests skip the server without waiting for a timeout. Once the
+open period is over a single half-open trial request decides whether it
+closes again or stays open (for twice as long).
+"""
+from __future__ import annotations
+
+import math
+import time
+from collections import deque
+from statistics import median
+
+# Samples kept per server
+LATENCY_WINDOW = 50
+OUTCOME_WINDOW = 20
+
+# A server below this success rate is only used when nothing better is left
+MIN_HEALTHY_SUCCESS_RATE = 0.75
+
+# The configured server counts as "slower" than an alternative when its median
+# latency is this much higher, in this many probe rounds in a row.
+SLOW_FACTOR = 1.5
+SLOW_MIN_DIFFERENCE = 0.1   # seconds
+SLOW_ROUNDS = 3
+MIN_SAMPLES = 3
+
+# Latency is the time to the response headers. Adaptive timeouts: connecting
+# and each wait for data may take TIMEOUT_FACTOR times the server's p99 latency
+# (never less than MIN_TIMEOUT, never more than the caller's timeout, which
+# still bounds the whole download). Once a request has not been answered
+# within the server's p95, a hedged duplicate is sent to the next mirror.
+# Both need PERCENTILE_MIN_SAMPLES samples to kick in.
+TIMEOUT_PERCENTILE = 0.99
+TIMEOUT_FACTOR = 3.0
+MIN_TIMEOUT = 2.0           # seconds
+HEDGE_PERCENTILE = 0.95
+PERCENTILE_MIN_SAMPLES = 10
+
+# Circuit breaker
+BREAKER_FAILURE_THRESHOLD = 3   # consecutive failures that open the breaker
+BREAKER_OPEN_TIME = 60.0        # seconds before the first half-open trial
+BREAKER_MAX_OPEN_TIME = 15 * 60.0
+
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+
+
+class ServerStats:
+    """Rolling latency and outcome samples and circuit breaker of one base URL."""
+
+    __slots__ = (
+        "latencies",
+        "outcomes",
+        "consecutive_failures",
+        "_opened_until",
+        "_open_time",
+        "_trial_running",
+    )
+
+    def __init__(self) -> None:
+        """Initialize empty statistics with a closed breaker."""
+        self.latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.outcomes: deque[bool] = deque(maxlen=OUTCOME_WINDOW)
+        self.consecutive_failures = 0
+        self._opened_until: float | None = None  # monotonic; None = closed
+        self._open_time = BREAKER_OPEN_TIME
+        self._trial_running = False
+
+    def record_success(self, latency: float) -> None:
+        """Record a request whose response headers arrived after ``latency`` seconds."""
+        self.latencies.append(latency)
+        self.outcomes.append(True)
+        self.consecutive_failures = 0
+        self._opened_until = None
+        self._open_time = BREAKER_OPEN_TIME
+        self._trial_running = False
+
+    def record_failure(self) -> None:
+        """Record a timeout, connection error or server error."""
+        self.outcomes.append(False)
+        self.consecutive_failures += 1
+        if self._opened_until is not None:
+            # Half-open trial failed — stay open for longer
+            self._open_time = min(self._open_time * 2, BREAKER_MAX_OPEN_TIME)
+        elif self.consecutive_failures < BREAKER_FAILURE_THRESHOLD:
+            return
+        self._opened_until = time.monotonic() + self._open_time
+        self._trial_running = False
+
+    def record_abandoned(self) -> None:
+        """Record a request that was cancelled before it got an answer."""
+        self._trial_running = False
+
+    def allow_request(self) -> bool:
+        """Return whether a request may be sent now.
+
+        While open, only one trial request is let through once the open
+        period has passed; its outcome closes or re-opens the breaker.
+        """
+        if self._opened_until is None:
+            return True
+        if self._trial_running or time.monotonic() < self._opened_until:
+            return False
+        self._trial_running = True
+        return True
+
+    @property
+    def breaker_state(self) -> str:
+        """Return BREAKER_CLOSED, BREAKER_OPEN or BREAKER_HALF_OPEN."""
+        if self._opened_until is None:
+            return BREAKER_CLOSED
+        if self._trial_running or time.monotonic() >= self._opened_until:
+            return BREAKER_HALF_OPEN
+        return BREAKER_OPEN
+
+    @property
+    def success_rate(self) -> float:
+        """Share of successful requests (1.0 while nothing is known)."""
+        if not self.outcomes:
+            return 1.0
+        return sum(self.outcomes) / len(self.outcomes)
+
+    @property
+    def median_latency(self) -> float | None:
+        """Median latency in seconds, or None without samples."""
+        return median(self.latencies) if self.latencies else None
+
+    def percentile(self, fraction: float) -> float | None:
+        """Latency percentile (nearest rank), or None with too few samples."""
+        if len(self.latencies) < PERCENTILE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, math.ceil(fraction * len(ordered)) - 1)]
+
+    def timeout(self, ceiling: float) -> float:
+        """Return the connect and read timeout for this server, at most ``ceiling``."""
+        p99 = self.percentile(TIMEOUT_PERCENTILE)
+        if p99 is None:
+            return ceiling
+        return min(ceiling, max(MIN_TIMEOUT, p99 * TIMEOUT_FACTOR))
+
+    @property
+    def hedge_delay(self) -> float | None:
+        """Seconds after which a hedged request should be sent (p95), or None."""
+        return self.percentile(HEDGE_PERCENTILE)
+
+    def as_dict(self) -> dict[str, float | int | str | None]:
+        """Return a summary for diagnostics."""
+        p95 = self.percentile(HEDGE_PERCENTILE)
+        p99 = self.percentile(TIMEOUT_PERCENTILE)
+        return {
+            "median_latency_ms": (
+                round(self.median_latency * 1000) if self.latencies else None
+            ),
+            "p95_latency_ms": round(p95 * 1000) if p95 is not None else None,
+            "p99_latency_ms": round(p99 * 1000) if p99 is not None else None,
+            "success_rate": round(self.success_rate, 2),
+            "samples": len(self.latencies),
+            "breaker": self.breaker_state,
+        }
+
+
+class ServerPool:
+    """Ranks the mirrors that host a school by health and latency."""
+
+    def __init__(self, configured: str) -> None:
+        """Initialize with the user's configured server as the only candidate."""
+        self.configured = configured
+        self.stats: dict[str, ServerStats] = {configured: ServerStats()}
+        self._slow_rounds = 0
+
+    def add(self, base_url: str) -> ServerStats:
+        """Register a mirror that hosts the school (no-op if known)."""
+        stats = self.stats.get(base_url)
+        if stats is None:
+            stats = self.stats[base_url] = ServerStats()
+        return stats
+
+    def discard(self, base_url: str) -> None:
+        """Forget a mirror that no longer hosts the school."""
+        if base_url != self.configured:
+            self.stats.pop(base_url, None)
+
+    def reset(self, configured: str) -> None:
+        """Start over with a different configured server."""
+        self.configured = configured
+        self.stats = {configured: ServerStats()}
+        self._slow_rounds = 0
+
+    def ranked(self) -> list[str]:
+        """Return all candidates, best first.
+
+        Healthy servers come before unhealthy ones and are ordered by median
+        latency; servers without samples yet keep their place behind measured
+        ones, and the configured server wins ties.
+        """
+        def sort_key(base_url: str) -> tuple:
+            stats = self.stats[base_url]
+            healthy = stats.success_rate >= MIN_HEALTHY_SUCCESS_RATE
+            latency = stats.median_latency
+            return (
+                not healthy,
+                latency is None,
+                latency if latency is not None else 0.0,
+                base_url != self.configured,
+            )
+
+        return sorted(self.stats, key=sort_key)
+
+    @property
+    def active(self) -> str:
+        """The server requests currently go to first."""
+        return self.ranked()[0]
+
+    def update_slow_rounds(self) -> None:
+        """Count probe rounds in which the configured server lost clearly."""
+        if self.faster_alternative() is not None:
+            self._slow_rounds += 1
+        else:
+            self._slow_rounds = 0
+
+    def faster_alternative(self) -> tuple[str, float, float] | None:
+        """Return ``(base_url, configured_latency, alternative_latency)``.
+
+        Only reported when the best alternative is healthy and clearly faster
+        than the configured server, based on enough samples of both.
+        """
+        own = self.stats[self.configured]
+        own_latency = own.median_latency
+        if own_latency is None or len(own.latencies) < MIN_SAMPLES:
+            return None
+        best: tuple[str, float, float] | None = None
+        for base_url, stats in self.stats.items():
+            latency = stats.median_latency
+            if (
+                base_url == self.configured
+                or latency is None
+                or len(stats.latencies) < MIN_SAMPLES
+                or stats.success_rate < MIN_HEALTHY_SUCCESS_RATE
+            ):
+                continue
+            if (
+                own_latency >= latency * SLOW_FACTOR
+                and own_latency - latency >= SLOW_MIN_DIFFERENCE
+                and (best is None or latency < best[2])
+            ):
+                best = (base_url, own_latency, latency)
+        return best
+
+    @property
+    def consistently_slower(self) -> tuple[str, float, float] | None:
+        """Like ``faster_alternative`` but only after several rounds in a row."""
+        if self._slow_rounds < SLOW_ROUNDS:
+            return None
+        return self.faster_alternative()
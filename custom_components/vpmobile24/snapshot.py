@@ -0,0 +1,136 @@
+"""Persistent snapshot of the data a VpMobile24 coordinator published.
+
+After a restart the sensors have nothing to show until the first refresh
+has downloaded and parsed today's plan, and stay empty for as long as
+stundenplan24.de is unreachable. The coordinator therefore keeps its
+assembled week, its day cache and the school's period grid in a ``Store``
+and publishes them right away on the next start; the first refresh then
+revalidates them.
+
+Lessons are stored as rows of their constructor arguments (``Lesson.as_row``)
+rather than as dicts repeating every key.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.helpers.storage import Store
+
+from .const import SNAPSHOT_SAVE_DELAY, SNAPSHOT_STORAGE_KEY, SNAPSHOT_STORAGE_VERSION
+from .models import Lesson, PeriodGrid
+
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant
+
+_LOGGER = logging.getLogger(__name__)
+
+# Keys of day and week dicts that hold lesson lists
+_LESSON_LISTS = frozenset({"lessons", "changes", "week_lessons", "week_changes"})
+
+
+def _encode(values: dict[str, Any]) -> dict[str, Any]:
+    """Return a copy of a day or week dict with its lessons as rows."""
+    return {
+        key: [lesson.as_row() for lesson in value] if key in _LESSON_LISTS else value
+        for key, value in values.items()
+    }
+
+
+def _decode(values: dict[str, Any]) -> dict[str, Any]:
+    """Return a day or week dict with its rows turned back into lessons."""
+    return {
+        key: [Lesson(*row) for row in value] if key in _LESSON_LISTS else value
+        for key, value in values.items()
+    }
+
+
+class Snapshot:
+    """The week a coordinator published and the day cache it was built from."""
+
+    __slots__ = ("settings", "monday", "week", "days", "period_grid", "saved")
+
+    def __init__(
+        self,
+        settings: list[Any],
+        monday: str | None,
+        week: dict[str, Any],
+        days: dict[str, dict[str, Any]],
+        period_grid: PeriodGrid,
+        saved: float | None = None,
+    ) -> None:
+        """Initialize a snapshot.
+
+        ``settings`` are the entry options the data was filtered with (a
+        snapshot taken with other settings is not restored), ``monday`` the
+        ISO date of the week it covers, ``week`` the published week lessons
+        and changes, ``days`` the day cache keyed by ISO date. ``period_grid``
+        gives lessons without times of their own their times until a plan
+        has been parsed again.
+        """
+        self.settings = settings
+        self.monday = monday
+        self.week = week
+        self.days = days
+        self.period_grid = period_grid
+        self.saved = time.time() if saved is None else saved
+
+    @property
+    def age(self) -> float:
+        """Seconds since the snapshot was taken."""
+        return max(0.0, time.time() - self.saved)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the JSON-serializable form written to the store."""
+        return {
+            "saved": self.saved,
+            "settings": self.settings,
+            "monday": self.monday,
+            "week": _encode(self.week),
+            "days": {date_str: _encode(day) for date_str, day in self.days.items()},
+            "period_grid": self.period_grid.as_rows(),
+        }
+
+    @classmethod
+    def from_dict(cls, stored: dict[str, Any]) -> Snapshot:
+        """Rebuild a snapshot from ``as_dict()`` output."""
+        return cls(
+            stored["settings"],
+            stored["monday"],
+            _decode(stored["week"]),
+            {date_str: _decode(day) for date_str, day in stored["days"].items()},
+            # Snapshots of earlier versions have no grid
+            PeriodGrid.from_rows(stored.get("period_grid", [])),
+            stored["saved"],
+        )
+
+
+class SnapshotStore:
+    """Reads and writes the snapshot of one config entry."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the store (nothing is read until ``async_load``)."""
+        self._store: Store[dict[str, Any]] = Store(
+            hass, SNAPSHOT_STORAGE_VERSION, f"{SNAPSHOT_STORAGE_KEY}.{entry_id}"
+        )
+
+    async def async_load(self) -> Snapshot | None:
+        """Return the stored snapshot, or None if there is none or it is unreadable."""
+        stored = await self._store.async_load()
+        if not stored:
+            return None
+        try:
+            return Snapshot.from_dict(stored)
+        except (KeyError, TypeError, ValueError, AttributeError) as err:
+            _LOGGER.debug("VpMobile24: ignoring unreadable snapshot: %s", err)
+            return None
+
+    def async_delay_save(self, snapshot: Callable[[], Snapshot]) -> None:
+        """Write ``snapshot()`` after SNAPSHOT_SAVE_DELAY seconds (or at shutdown)."""
+        self._store.async_delay_save(lambda: snapshot().as_dict(), SNAPSHOT_SAVE_DELAY)
+
+    async def async_remove(self) -> None:
+        """Delete the stored snapshot (config entry removed)."""
+        await self._store.async_remove()
@@ -0,0 +1,163 @@
+"""Shared, connection-pooled HTTP transport for VpMobile24.
+
+Every HTTP request of the integration (stundenplan24 plans, class lists,
+ferien-api.de holidays) goes through one ``VpMobile24Transport`` so TCP/TLS
+connections are kept alive and reused across config entries and update
+cycles instead of being re-established by short-lived sessions.
+
+Inside Home Assistant the transport wraps HA's shared client session
+(``async_get_transport``); outside of it (scripts, tests) a private session
+with a tuned connector is created on first use.
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING
+from urllib.parse import urlsplit
+
+import aiohttp
+from aiohttp import BasicAuth
+
+from .const import DATA_TRANSPORT, DOMAIN, MAX_FETCH_CONCURRENCY
+
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant
+
+_LOGGER = logging.getLogger(__name__)
+
+# Connection pool defaults
+HTTP_POOL_LIMIT = 20          # open connections in total
+# Concurrent requests per host, shared by all entries (be nice to mirrors); the
+# fetch concurrency option is capped at this
+HTTP_LIMIT_PER_HOST = MAX_FETCH_CONCURRENCY
+HTTP_KEEPALIVE_TIMEOUT = 60   # seconds an idle connection is kept open
+HTTP_DNS_CACHE_TTL = 600      # seconds a resolved host name is reused
+
+USER_AGENT = "VpMobile24-HA/2.5 (github.com/Maximilian-Andrew-Kluge/VpMobile24)"
+
+_DEFAULT_TRANSPORT: VpMobile24Transport | None = None
+
+
+@functools.lru_cache(maxsize=32)
+def basic_auth_header(username: str, password: str) -> str:
+    """Return the ready-made ``Authorization`` header value for the credentials."""
+    return BasicAuth(username, password).encode()
+
+
+class VpMobile24Transport:
+    """Pooled HTTP access with a per-host concurrency limit."""
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession | None = None,
+        *,
+        limit: int = HTTP_POOL_LIMIT,
+        limit_per_host: int = HTTP_LIMIT_PER_HOST,
+        keepalive_timeout: float = HTTP_KEEPALIVE_TIMEOUT,
+        dns_cache_ttl: int = HTTP_DNS_CACHE_TTL,
+    ) -> None:
+        """Initialize the transport.
+
+        With ``session`` given (HA's shared session) the connector settings
+        are HA's; otherwise the remaining arguments configure the private
+        session created on first use.
+        """
+        self._session = session
+        self._owns_session = session is None
+        self._limit = limit
+        self._limit_per_host = limit_per_host
+        self._keepalive_timeout = keepalive_timeout
+        self._dns_cache_ttl = dns_cache_ttl
+        self._host_slots: dict[str, asyncio.Semaphore] = {}
+        self._session_lock: asyncio.Lock | None = None
+
+    async def async_get_session(self) -> aiohttp.ClientSession:
+        """Return the underlying session, creating the private one if needed."""
+        if self._session is not None and not self._session.closed:
+            return self._session
+        if self._session_lock is None:
+            self._session_lock = asyncio.Lock()
+        async with self._session_lock:
+            if self._session is None or self._session.closed:
+                connector = aiohttp.TCPConnector(
+                    limit=self._limit,
+                    limit_per_host=self._limit_per_host,
+                    keepalive_timeout=self._keepalive_timeout,
+                    ttl_dns_cache=self._dns_cache_ttl,
+                    use_dns_cache=True,
+                )
+                self._session = aiohttp.ClientSession(
+                    connector=connector, headers={"User-Agent": USER_AGENT}
+                )
+                self._owns_session = True
+        return self._session
+
+    def _host_slot(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).hostname or ""
+        slot = self._host_slots.get(host)
+        if slot is None:
+            slot = self._host_slots[host] = asyncio.Semaphore(self._limit_per_host)
+        return slot
+
+    @asynccontextmanager
+    async def get(
+        self,
+        url: str,
+        *,
+        headers: dict[str, str] | None = None,
+        timeout: float = 10,
+        read_timeout: float | None = None,
+    ) -> AsyncIterator[aiohttp.ClientResponse]:
+        """Issue a GET request; use as ``async with transport.get(url) as resp``.
+
+        ``timeout`` bounds the whole request, reading the body included;
+        ``read_timeout`` (if given) bounds connecting and each wait for data,
+        the wait for the response headers included.
+        """
+        session = await self.async_get_session()
+        request_headers = {"User-Agent": USER_AGENT}
+        if headers:
+            request_headers.update(headers)
+        async with self._host_slot(url):
+            async with session.get(
+                url,
+                headers=request_headers,
+                timeout=aiohttp.ClientTimeout(
+                    total=timeout, sock_connect=read_timeout, sock_read=read_timeout
+                ),
+            ) as response:
+                yield response
+
+    async def async_close(self) -> None:
+        """Close the private session (HA's shared session is left alone)."""
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+def get_default_transport() -> VpMobile24Transport:
+    """Return the process-wide transport used when no HA instance is at hand."""
+    global _DEFAULT_TRANSPORT
+    if _DEFAULT_TRANSPORT is None:
+        _DEFAULT_TRANSPORT = VpMobile24Transport()
+    return _DEFAULT_TRANSPORT
+
+
+def async_get_transport(hass: HomeAssistant) -> VpMobile24Transport:
+    """Return the transport bound to HA's shared client session.
+
+    Must be called from the event loop. The instance is kept in
+    ``hass.data[DOMAIN]`` so config flows and all entries share it.
+    """
+    from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    transport = domain_data.get(DATA_TRANSPORT)
+    if transport is None:
+        transport = VpMobile24Transport(async_get_clientsession(hass))
+        domain_data[DATA_TRANSPORT] = transport
+    return transport
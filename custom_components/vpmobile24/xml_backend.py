@@ -0,0 +1,89 @@
+"""XML parser backend of VpMobile24.
+
+stundenplan24 files are parsed with lxml's C parser when lxml happens to be
+installed; it is not a requirement of the integration, so otherwise the
+standard library's ElementTree is used. Elements of both backends offer the
+same API (``tag``, ``text``, ``attrib``, ``get``, ``find``, ``findall``,
+iteration), so the parsing code is written once against that.
+
+The speedup of lxml comes from two places: the pull parser only reports the
+end events of the tags that are asked for (ElementTree reports every element
+and the filtering happens in Python), and element paths are compiled to
+XPath expressions once.
+"""
+from __future__ import annotations
+
+from collections.abc import Callable, Iterator
+from typing import Any, Protocol
+import xml.etree.ElementTree as ET
+
+try:
+    from lxml import etree as _lxml
+except ImportError:  # pragma: no cover - depends on the installation
+    _lxml = None
+
+BACKEND_LXML = "lxml"
+BACKEND_ELEMENTTREE = "elementtree"
+
+BACKEND = BACKEND_LXML if _lxml is not None else BACKEND_ELEMENTTREE
+
+# Element of the active backend; lxml's _Element has the same API
+Element = ET.Element
+
+# Raised by both backends on malformed XML
+ParseError: tuple[type[Exception], ...] = (
+    (ET.ParseError, _lxml.XMLSyntaxError) if _lxml is not None else (ET.ParseError,)
+)
+
+
+class PullParser(Protocol):
+    """Non-blocking parser that reports completed elements."""
+
+    def feed(self, data: str | bytes) -> None:
+        """Parse the next chunk of the document."""
+
+    def close(self) -> Any:
+        """Finish the document."""
+
+    def read_events(self) -> Iterator[tuple[str, Element]]:
+        """Return the ``("end", element)`` events collected so far."""
+
+
+def _lxml_options() -> dict[str, Any]:
+    # Never fetch or expand anything the document refers to
+    return {"resolve_entities": False, "no_network": True}
+
+
+def fromstring(data: str | bytes, *, backend: str = BACKEND) -> Element:
+    """Parse a complete document and return its root element."""
+    if backend == BACKEND_LXML:
+        # Unlike lxml.etree.fromstring() the feed interface also accepts str
+        # documents that carry an encoding declaration
+        parser = _lxml.XMLParser(**_lxml_options())
+        parser.feed(data)
+        return parser.close()
+    return ET.fromstring(data)
+
+
+def pull_parser(tags: tuple[str, ...], *, backend: str = BACKEND) -> PullParser:
+    """Return a pull parser for the end events of ``tags``.
+
+    With ElementTree the end events of all other elements are reported too;
+    callers must check the tag.
+    """
+    if backend == BACKEND_LXML:
+        return _lxml.XMLPullParser(events=("end",), tag=tags, **_lxml_options())
+    return ET.XMLPullParser(events=("end",))
+
+
+def compile_path(
+    path: str, *, backend: str = BACKEND
+) -> Callable[[Element], list[Element]]:
+    """Compile an element path (the subset both backends understand).
+
+    Returns a function that maps an element to the elements matching ``path``
+    relative to it, in document order.
+    """
+    if backend == BACKEND_LXML:
+        return _lxml.XPath(path)
+    return lambda element: element.findall(path)
@@ -0,0 +1,188 @@
+"""Persistent on-disk cache of raw plan XML for VpMobile24.
+
+Every downloaded ``PlanKl<date>.xml`` body is stored gzip-compressed under the
+Home Assistant config directory so that a restart or reload can revalidate
+against the server (or skip the request entirely while the copy is fresh)
+instead of downloading all prefetched days again.
+
+Layout::
+
+    <directory>/index.json            {"<school>/<YYYYMMDD>": entry, ...}
+    <directory>/<sha256>.xml.gz       one blob per distinct payload
+
+Entries are keyed by school and plan date and record the plan's
+``<zeitstempel>``; blobs are content-addressed, so identical payloads (the same
+holiday placeholder for several days, two entries of the same school) are
+stored once. All methods block on file I/O — call them from an executor.
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections.abc import Iterable
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any
+
+_LOGGER = logging.getLogger(__name__)
+
+# Plans of past days are kept this long (the week view still shows them)
+RETENTION_DAYS = 7
+
+# The <zeitstempel> of a PlanKl file is looked for in this many leading bytes
+# (it sits in <Kopf>, within the first few hundred)
+TIMESTAMP_PREFIX_SIZE = 4 * 1024
+
+
+def plan_timestamp(body: bytes) -> str | None:
+    """Return the <zeitstempel> of a PlanKl file without parsing it.
+
+    Only the first ``TIMESTAMP_PREFIX_SIZE`` bytes are scanned; returns None
+    if the element is not found there or is empty.
+    """
+    head = body[:TIMESTAMP_PREFIX_SIZE]
+    start = head.find(b"<zeitstempel>")
+    if start < 0:
+        return None
+    start += len(b"<zeitstempel>")
+    end = head.find(b"</zeitstempel>", start)
+    if end < 0:
+        return None
+    # latin-1 maps every byte, so different stamps never compare equal
+    return head[start:end].strip().decode("latin-1") or None
+
+
+class PlanXmlCache:
+    """Content-addressed, compressed store of raw PlanKl XML bodies."""
+
+    def __init__(self, directory: Path, retention_days: int = RETENTION_DAYS) -> None:
+        """Initialize the cache (nothing is read until first use)."""
+        self._directory = directory
+        self._index_path = directory / "index.json"
+        self._retention_days = retention_days
+        self._index: dict[str, dict[str, Any]] | None = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(school_id: str, plan_date: date) -> str:
+        return f"{school_id}/{plan_date.strftime('%Y%m%d')}"
+
+    def _blob_path(self, digest: str) -> Path:
+        return self._directory / f"{digest}.xml.gz"
+
+    def _load_index(self) -> dict[str, dict[str, Any]]:
+        """Return the index, reading it from disk on first access."""
+        if self._index is None:
+            try:
+                self._index = json.loads(self._index_path.read_text(encoding="utf-8"))
+            except FileNotFoundError:
+                self._index = {}
+            except (OSError, ValueError) as err:
+                _LOGGER.warning("VpMobile24: XML cache index unreadable, starting empty: %s", err)
+                self._index = {}
+        return self._index
+
+    def _save_index(self) -> None:
+        self._directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._index_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self._index, separators=(",", ":")), encoding="utf-8")
+        tmp_path.replace(self._index_path)
+
+    def get(self, school_id: str, plan_date: date) -> tuple[dict[str, Any], bytes] | None:
+        """Return ``(entry, body)`` for a plan date, or None if not cached."""
+        with self._lock:
+            entry = self._load_index().get(self._key(school_id, plan_date))
+            if entry is None:
+                return None
+            try:
+                body = gzip.decompress(self._blob_path(entry["sha256"]).read_bytes())
+            except (OSError, EOFError) as err:
+                _LOGGER.debug("VpMobile24: dropping broken XML cache entry %s: %s", entry, err)
+                self._index.pop(self._key(school_id, plan_date), None)
+                self._save_index()
+                return None
+            return dict(entry), body
+
+    def put(
+        self,
+        school_id: str,
+        plan_date: date,
+        body: bytes,
+        etag: str | None = None,
+        last_modified: str | None = None,
+    ) -> None:
+        """Store a freshly downloaded body together with its validators."""
+        digest = hashlib.sha256(body).hexdigest()
+        with self._lock:
+            index = self._load_index()
+            blob_path = self._blob_path(digest)
+            if not blob_path.exists():
+                self._directory.mkdir(parents=True, exist_ok=True)
+                blob_path.write_bytes(gzip.compress(body, compresslevel=6))
+            index[self._key(school_id, plan_date)] = {
+                "sha256": digest,
+                "zeitstempel": plan_timestamp(body) or "",
+                "etag": etag,
+                "last_modified": last_modified,
+                "checked": time.time(),
+            }
+            self._evict(index, date.today())
+            self._save_index()
+
+    def fresh_dates(
+        self, school_id: str, plan_dates: Iterable[date], max_age: float
+    ) -> set[date]:
+        """Return those of ``plan_dates`` confirmed less than ``max_age`` seconds ago."""
+        now = time.time()
+        with self._lock:
+            index = self._load_index()
+            return {
+                plan_date
+                for plan_date in plan_dates
+                if (entry := index.get(self._key(school_id, plan_date))) is not None
+                and now - entry["checked"] < max_age
+            }
+
+    def touch(self, school_id: str, plan_date: date) -> None:
+        """Record that the cached body was just confirmed by the server (304)."""
+        with self._lock:
+            entry = self._load_index().get(self._key(school_id, plan_date))
+            if entry is not None:
+                entry["checked"] = time.time()
+                self._save_index()
+
+    def evict_expired(self) -> None:
+        """Drop entries for days past the retention window and orphaned blobs."""
+        with self._lock:
+            index = self._load_index()
+            if self._evict(index, date.today()):
+                self._save_index()
+
+    def _evict(self, index: dict[str, dict[str, Any]], today: date) -> bool:
+        """Evict expired entries in place. Returns True if anything was removed."""
+        cutoff = (today - timedelta(days=self._retention_days)).strftime("%Y%m%d")
+        expired = [key for key in index if key.rpartition("/")[2] < cutoff]
+        for key in expired:
+            del index[key]
+
+        # Delete blobs that no entry references any more
+        referenced = {entry["sha256"] for entry in index.values()}
+        removed_blobs = 0
+        if self._directory.is_dir():
+            for blob in self._directory.glob("*.xml.gz"):
+                if blob.name[: -len(".xml.gz")] not in referenced:
+                    try:
+                        blob.unlink()
+                        removed_blobs += 1
+                    except OSError:
+                        pass
+        if expired or removed_blobs:
+            _LOGGER.debug(
+                "VpMobile24: XML cache evicted %d entries, %d blobs",
+                len(expired), removed_blobs,
+            )
+        return bool(expired)
@@ -0,0 +1,311 @@
+"""Benchmarks for plan parsing and the memory lessons take.
+
+Run from the repository root with the test requirements installed
+(``pip install -r requirements_test.txt``)::
+
+    python scripts/benchmark.py lessons
+    python scripts/benchmark.py --backend elementtree lessons
+    python scripts/benchmark.py memory
+    python scripts/benchmark.py backends
+
+Large plans are built by repeating the classes of the recorded fixture
+``tests/fixtures/PlanKl20261019.xml`` under new names, so the numbers can
+be reproduced on any machine; compare them between runs on the same one.
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import re
+import resource
+import subprocess
+import sys
+import timeit
+import tracemalloc
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from custom_components.vpmobile24.api_new import (  # noqa: E402
+    STREAM_CHUNK_SIZE,
+    Stundenplan24API,
+    _SchoolPlanParser,
+    parse_school_plan,
+)
+from custom_components.vpmobile24.models import Lesson  # noqa: E402
+from custom_components.vpmobile24.xml_backend import (  # noqa: E402
+    BACKEND,
+    BACKEND_ELEMENTTREE,
+    BACKEND_LXML,
+    fromstring,
+)
+
+FIXTURE = ROOT / "tests" / "fixtures" / "PlanKl20261019.xml"
+PLAN_DATE = date(2026, 10, 19)
+
+_KL_RE = re.compile(r"<Kl>.*?</Kl>", re.S)
+_KURZ_RE = re.compile(r"<Kurz>([^<]*)</Kurz>")
+
+
+def build_plan(classes: int) -> bytes:
+    """Return the fixture plan with its classes repeated up to ``classes``."""
+    text = FIXTURE.read_text(encoding="utf-8")
+    blocks = _KL_RE.findall(text)
+    head = text[:text.index(blocks[0])]
+    tail = text[text.index(blocks[-1]) + len(blocks[-1]):]
+    body = []
+    for number in range(classes):
+        block = blocks[number % len(blocks)]
+        copy = number // len(blocks)
+        if copy:
+            block = _KURZ_RE.sub(
+                lambda match: f"<Kurz>{match.group(1)}-{copy}</Kurz>", block, count=1
+            )
+        body.append(block)
+    return (head + "".join(body) + tail).encode("utf-8")
+
+
+def best_of(func: Any, repeat: int, number: int = 1) -> float:
+    """Return the fastest of ``repeat`` runs of ``func``, in milliseconds."""
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number * 1000
+
+
+# ── lessons: single-pass _parse_lesson vs a find() per field ────────────
+
+
+def parse_lesson_find(std_element: Any, class_name: str) -> Lesson | None:
+    """The lesson parser before user-011: one ``find()`` per field."""
+    lesson: dict[str, Any] = {
+        "period": "", "time_start": "", "time_end": "", "subject": "",
+        "teacher": "", "room": "", "course": "", "info": "",
+        "is_change": False, "nr": "",
+    }
+    st = std_element.find("St")
+    if st is not None and st.text:
+        lesson["period"] = st.text
+    beginn = std_element.find("Beginn")
+    ende = std_element.find("Ende")
+    if beginn is not None and beginn.text:
+        lesson["time_start"] = beginn.text
+    if ende is not None and ende.text:
+        lesson["time_end"] = ende.text
+    for tag, field, attribute, changed in (
+        ("Fa", "subject", "FaAe", "FaGeaendert"),
+        ("Le", "teacher", "LeAe", "LeGeaendert"),
+        ("Ra", "room", "RaAe", "RaGeaendert"),
+    ):
+        element = std_element.find(tag)
+        if element is not None and element.text:
+            lesson[field] = element.text
+            if element.get(attribute) == changed:
+                lesson["is_change"] = True
+    ku2 = std_element.find("Ku2")
+    if ku2 is not None and ku2.text:
+        lesson["course"] = ku2.text
+    nr = std_element.find("Nr")
+    if nr is not None and nr.text:
+        lesson["nr"] = nr.text.strip()
+    info = std_element.find("If")
+    if info is not None and info.text:
+        lesson["info"] = info.text
+        lesson["is_change"] = True
+    if not lesson["subject"] and lesson["info"] and lesson["teacher"]:
+        lesson["subject"] = lesson["info"]
+    if lesson["time_start"] and lesson["time_end"]:
+        lesson["time"] = f"{lesson['time_start']}-{lesson['time_end']}"
+    elif lesson["time_start"]:
+        lesson["time"] = lesson["time_start"]
+    else:
+        lesson["time"] = f"{lesson['period']}. Stunde"
+    if lesson["period"] or lesson["subject"]:
+        return Lesson(class_name, **lesson)
+    return None
+
+
+def bench_lessons(args: argparse.Namespace) -> None:
+    """Time both lesson parsers on every <Std>, then on a whole plan."""
+    single_pass = Stundenplan24API._parse_lesson
+    body = build_plan(args.classes)
+    stds = list(fromstring(body, backend=args.backend).iter("Std"))
+    for std in stds:
+        assert single_pass(std, "x") == parse_lesson_find(std, "x")
+
+    def run(parse_lesson: Any) -> None:
+        for std in stds:
+            parse_lesson(std, "x")
+
+    def full_parse(parse_lesson: Any) -> float:
+        Stundenplan24API._parse_lesson = staticmethod(parse_lesson)
+        try:
+            return best_of(
+                lambda: parse_school_plan(body, PLAN_DATE, args.backend), args.repeat
+            )
+        finally:
+            Stundenplan24API._parse_lesson = staticmethod(single_pass)
+
+    print(f"{args.classes} classes, {len(stds)} <Std>, {len(body) // 1024} KiB, {args.backend}")
+    for label, before, after in (
+        (
+            "_parse_lesson, all <Std>",
+            best_of(lambda: run(parse_lesson_find), args.repeat),
+            best_of(lambda: run(single_pass), args.repeat),
+        ),
+        ("parse_school_plan", full_parse(parse_lesson_find), full_parse(single_pass)),
+    ):
+        print(f"  {label:26} find(): {before:7.2f} ms   single pass: {after:7.2f} ms"
+              f"   {before / after:.2f}x")
+
+
+# ── memory: Lesson records vs dict lessons ──────────────────────────────
+
+# Days of plans an entry keeps: this week and the two prefetched ones
+MEMORY_DAYS = 15
+DAY_NAMES = ("Montag", "Dienstag", "Mittwoch", "Donnerstag", "Freitag")
+
+
+def _unshared(value: Any) -> Any:
+    """Return a string equal to ``value`` but not identical to it.
+
+    Before user-013 every lesson dict held the strings the XML parser had
+    created for its own element; nothing was interned.
+    """
+    if isinstance(value, str) and len(value) > 1:
+        return value[:-1] + value[-1:]
+    return value
+
+
+def _as_dict(lesson: Lesson, **changes: Any) -> dict[str, Any]:
+    """Return ``lesson`` as the dict the parser produced before user-013."""
+    values = {key: _unshared(value) for key, value in lesson.items()}
+    values.update(changes)
+    return values
+
+
+def _rss_kib() -> int:
+    """Return the peak resident set size of this process in KiB."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def _measure_memory(args: argparse.Namespace) -> None:
+    """Keep one entry's lessons in the chosen form and print what they take.
+
+    Prints the number of lessons kept and either the bytes traced by
+    tracemalloc (``--trace``) or the growth of the peak RSS in KiB; not
+    both, as tracing inflates the RSS.
+    """
+    days = [PLAN_DATE + timedelta(days=offset) for offset in range(21) if offset % 7 < 5]
+    body = build_plan(args.classes)
+    records = args.variant == "records"
+    gc.collect()
+    rss_before = _rss_kib()
+    if args.trace:
+        tracemalloc.start()
+    day_cache = []
+    week = []
+    for day in days[:MEMORY_DAYS]:
+        plan = parse_school_plan(body, day, args.backend)
+        day_cache.append({
+            name: list(lessons) if records else [_as_dict(lesson) for lesson in lessons]
+            for name, lessons in plan.by_class.items()
+        })
+        # The coordinator's week: dated copies of one class's lessons
+        dated = {"date": day.isoformat(), "day_name": DAY_NAMES[day.weekday()]}
+        week.extend(
+            lesson.replace(**dated) if records else _as_dict(lesson, **dated)
+            for lesson in plan.by_class["5a"]
+        )
+        del plan
+    gc.collect()
+    kept = sum(len(lessons) for by_class in day_cache for lessons in by_class.values())
+    used = tracemalloc.get_traced_memory()[0] if args.trace else _rss_kib() - rss_before
+    print(kept + len(week), used)
+
+
+def bench_memory(args: argparse.Namespace) -> None:
+    """Run the memory measurements for both forms, each in a fresh interpreter."""
+    if args.variant:
+        _measure_memory(args)
+        return
+    print(f"{MEMORY_DAYS} days of {args.classes} classes, {args.backend}")
+    for variant in ("dicts", "records"):
+        results = []
+        for trace in (True, False):
+            command = [
+                sys.executable, __file__, "--classes", str(args.classes),
+                "--backend", args.backend, "memory", "--variant", variant,
+            ]
+            output = subprocess.run(
+                command + ["--trace"] * trace, check=True, capture_output=True, text=True
+            ).stdout
+            results.append([int(value) for value in output.split()])
+        (lessons, traced), (_lessons, rss) = results
+        print(
+            f"  {variant:8} {lessons} lessons: traced {traced // 1024:6} KiB"
+            f" ({traced // lessons} B/lesson), peak RSS +{rss:6} KiB"
+        )
+
+
+# ── backends: lxml vs ElementTree ────────────────────────────────────────
+
+
+def _parse_streamed(body: bytes, backend: str) -> Any:
+    """Parse ``body`` fed in download-sized chunks, as the API streams it."""
+    parser = _SchoolPlanParser(PLAN_DATE, backend)
+    for start in range(0, len(body), STREAM_CHUNK_SIZE):
+        parser.feed(body[start:start + STREAM_CHUNK_SIZE])
+    return parser.close()
+
+
+def bench_backends(args: argparse.Namespace) -> None:
+    """Time both backends on the whole document and on streamed chunks."""
+    if BACKEND != BACKEND_LXML:
+        sys.exit("lxml is not installed")
+    body = build_plan(args.classes)
+    lxml_plan = parse_school_plan(body, PLAN_DATE, BACKEND_LXML)
+    etree_plan = parse_school_plan(body, PLAN_DATE, BACKEND_ELEMENTTREE)
+    for name, lessons in etree_plan.by_class.items():
+        assert [dict(lesson) for lesson in lxml_plan.by_class[name]] == [
+            dict(lesson) for lesson in lessons
+        ]
+    assert lxml_plan.by_class.keys() == etree_plan.by_class.keys()
+
+    print(f"{args.classes} classes, {len(body) // 1024} KiB")
+    for label, parse in (
+        ("parse_school_plan", lambda backend: parse_school_plan(body, PLAN_DATE, backend)),
+        ("streamed, 16 KiB chunks", lambda backend: _parse_streamed(body, backend)),
+    ):
+        etree = best_of(lambda: parse(BACKEND_ELEMENTTREE), args.repeat)
+        lxml = best_of(lambda: parse(BACKEND_LXML), args.repeat)
+        print(f"  {label:24} ElementTree: {etree:7.2f} ms   lxml: {lxml:7.2f} ms"
+              f"   {etree / lxml:.2f}x")
+
+
+def main() -> None:
+    """Run the benchmark chosen on the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--classes", type=int, default=200, help="classes per plan")
+    parser.add_argument("--repeat", type=int, default=15, help="runs, the best counts")
+    parser.add_argument(
+        "--backend", choices=(BACKEND_LXML, BACKEND_ELEMENTTREE), default=BACKEND,
+        help="XML backend (default: lxml if installed)",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("lessons", help="single-pass _parse_lesson vs a find() per field")
+    memory = commands.add_parser("memory", help="Lesson records vs dict lessons")
+    memory.add_argument("--variant", choices=("dicts", "records"), help=argparse.SUPPRESS)
+    memory.add_argument("--trace", action="store_true", help=argparse.SUPPRESS)
+    commands.add_parser("backends", help="lxml vs ElementTree")
+    args = parser.parse_args()
+    {
+        "lessons": bench_lessons,
+        "memory": bench_memory,
+        "backends": bench_backends,
+    }[args.command](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Tests for the VpMobile24 integration."""
@@ -0,0 +1,66 @@
+"""Fixtures for VpMobile24 tests."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from custom_components.vpmobile24.transport import VpMobile24Transport
+
+SCHOOL_ID = "10000000"
+
+
+class PlanServer:
+    """Local stand-in for a stundenplan24 mirror serving PlanKl files."""
+
+    def __init__(self) -> None:
+        """Initialize without plans; every unknown file answers 404."""
+        # File name → body
+        self.plans: dict[str, bytes] = {}
+        # Send bodies with chunked transfer encoding instead of Content-Length
+        self.chunked = False
+        self.chunk_size = 4096
+        # Seconds to wait before each chunk, to mimic a slow link
+        self.chunk_delay = 0.0
+        self.base_url = ""
+
+    async def handle(self, request: web.Request) -> web.StreamResponse:
+        """Answer a GET for a file below /<school>/mobil/mobdaten/."""
+        body = self.plans.get(request.match_info["name"])
+        if body is None:
+            return web.Response(status=404)
+        if not self.chunked:
+            return web.Response(body=body, content_type="text/xml")
+        response = web.StreamResponse()
+        response.content_type = "text/xml"
+        await response.prepare(request)
+        for start in range(0, len(body), self.chunk_size):
+            if self.chunk_delay:
+                await asyncio.sleep(self.chunk_delay)
+            await response.write(body[start:start + self.chunk_size])
+        await response.write_eof()
+        return response
+
+
+@pytest.fixture
+async def plan_server(socket_enabled: None) -> AsyncIterator[PlanServer]:
+    """Run a ``PlanServer`` on localhost (the only host tests may connect to)."""
+    server = PlanServer()
+    app = web.Application()
+    app.router.add_get("/{school}/mobil/mobdaten/{name}", server.handle)
+    test_server = TestServer(app)
+    await test_server.start_server()
+    server.base_url = str(test_server.make_url("")).rstrip("/")
+    yield server
+    await test_server.close()
+
+
+@pytest.fixture
+async def transport() -> AsyncIterator[VpMobile24Transport]:
+    """A private pooled transport, closed after the test."""
+    transport = VpMobile24Transport()
+    yield transport
+    await transport.async_close()
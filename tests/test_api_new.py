@@ -0,0 +1,113 @@
+"""Tests for downloading and parsing plan files in api_new."""
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+import pytest
+
+from custom_components.vpmobile24 import servers
+from custom_components.vpmobile24.api_new import Stundenplan24API, parse_school_plan
+from custom_components.vpmobile24.transport import VpMobile24Transport
+from custom_components.vpmobile24.xml_backend import BACKEND, BACKEND_LXML
+
+from .conftest import SCHOOL_ID, PlanServer
+
+FIRST_DATE = date(2026, 10, 19)
+
+
+def _large_plan(plan_date: date, classes: int = 150) -> bytes:
+    """Return a PlanKl body of about 200 KB."""
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?><VpMobil><Kopf>'
+        f"<zeitstempel>{plan_date:%d.%m.%Y}, 07:00</zeitstempel></Kopf><Klassen>"
+    ]
+    for number in range(classes):
+        name = f"{5 + number % 8}{chr(97 + number // 8)}"
+        parts.append(
+            f"<Kl><Kurz>{name}</Kurz>"
+            '<KlStunden><KlSt ZeitVon="07:30" ZeitBis="08:15">1</KlSt></KlStunden>'
+            f'<Unterricht><Ue><UeNr UeLe="L{number}" UeFa="MA">{number}</UeNr></Ue></Unterricht><Pl>'
+        )
+        for period in range(1, 9):
+            parts.append(
+                f"<Std><St>{period}</St><Beginn>07:30</Beginn><Ende>08:15</Ende>"
+                f'<Fa FaAe="FaGeaendert">MA</Fa><Le>L{number}</Le><Ra>R{period}</Ra>'
+                f"<Nr>{number}</Nr><If>Vertretung für Frau Müller</If></Std>"
+            )
+        parts.append("</Pl></Kl>")
+    parts.append("</Klassen></VpMobil>")
+    return "".join(parts).encode()
+
+
+@pytest.mark.skipif(BACKEND != BACKEND_LXML, reason="lxml is not installed")
+@pytest.mark.parametrize("chunked", [False, True])
+async def test_offloaded_plans_with_lxml(
+    plan_server: PlanServer, transport: VpMobile24Transport, chunked: bool
+) -> None:
+    """Plans above the offload size are parsed in worker threads without harm.
+
+    Feeding the chunks of one lxml parser from whichever executor thread was
+    free corrupted the heap and aborted the interpreter.
+    """
+    days = [FIRST_DATE + timedelta(days=offset) for offset in range(14)]
+    for day in days:
+        plan_server.plans[f"PlanKl{day:%Y%m%d}.xml"] = _large_plan(day)
+    plan_server.chunked = chunked
+    api = Stundenplan24API(
+        SCHOOL_ID,
+        "schueler",
+        "secret",
+        base_url=plan_server.base_url,
+        transport=transport,
+        parse_offload_size=1024,
+    )
+
+    fetched = await api.async_get_schedule_range(days[0], days[-1], "5a")
+
+    assert not fetched.errors
+    for day in days:
+        expected = parse_school_plan(_large_plan(day), day).schedule("5a")
+        assert [dict(lesson) for lesson in fetched.results[day]["lessons"]] == [
+            dict(lesson) for lesson in expected["lessons"]
+        ]
+        assert [dict(lesson) for lesson in fetched.results[day]["changes"]] == [
+            dict(lesson) for lesson in expected["changes"]
+        ]
+        assert fetched.results[day]["changes"]
+
+
+async def test_slow_body_is_bounded_by_the_configured_timeout(
+    plan_server: PlanServer,
+    transport: VpMobile24Transport,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """A download may take longer than the mirror's adaptive timeout.
+
+    The adaptive timeout is derived from how fast the mirror answers and only
+    bounds connecting and each wait for data, so a large plan arriving slowly
+    does not time out (and open the circuit breaker) on a mirror whose
+    latency samples come from small files.
+    """
+    monkeypatch.setattr(servers, "MIN_TIMEOUT", 0.2)
+    plan_server.plans[f"PlanKl{FIRST_DATE:%Y%m%d}.xml"] = _large_plan(FIRST_DATE, classes=10)
+    plan_server.chunked = True
+    plan_server.chunk_size = 2048
+    plan_server.chunk_delay = 0.1
+    api = Stundenplan24API(
+        SCHOOL_ID,
+        "slowlink",
+        "secret",
+        base_url=plan_server.base_url,
+        transport=transport,
+    )
+    stats = api.servers.stats[plan_server.base_url]
+    for _ in range(servers.PERCENTILE_MIN_SAMPLES):
+        stats.record_success(0.01)
+    assert stats.timeout(15) == 0.2
+
+    plan = await api.async_get_school_plan(FIRST_DATE)
+
+    assert len(plan.classes) == 10
+    assert stats.consecutive_failures == 0
+    # Time to the headers, not to the end of the body
+    assert stats.latencies[-1] < 0.2
@@ -0,0 +1,33 @@
+"""Tests for the config entry diagnostics."""
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.vpmobile24.api_new import Stundenplan24API
+from custom_components.vpmobile24.const import DOMAIN
+from custom_components.vpmobile24.diagnostics import async_get_config_entry_diagnostics
+
+from .conftest import SCHOOL_ID
+
+
+async def test_server_stats_in_diagnostics(hass: HomeAssistant) -> None:
+    """Latency percentiles and breaker state of every mirror are reported."""
+    entry = MockConfigEntry(domain=DOMAIN, data={"password": "secret"})
+    api = Stundenplan24API(SCHOOL_ID, "diagnostics", "secret", base_url="https://a.example")
+    stats = api.servers.add("https://b.example")
+    for latency in range(1, 11):
+        stats.record_success(latency / 100)
+    hass.data[DOMAIN] = {entry.entry_id: SimpleNamespace(api=api)}
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+
+    servers = diagnostics["servers"]
+    assert servers["configured"] == "https://a.example"
+    assert servers["active"] == "https://b.example"
+    assert servers["stats"]["https://a.example"]["samples"] == 0
+    assert servers["stats"]["https://b.example"]["p95_latency_ms"] == 100
+    assert servers["stats"]["https://b.example"]["breaker"] == "closed"
+    assert diagnostics["entry"]["data"]["password"] == "**REDACTED**"
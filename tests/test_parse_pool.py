@@ -0,0 +1,62 @@
+"""Tests for the shared parse process pool."""
+from __future__ import annotations
+
+import pytest
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import HomeAssistant
+
+from custom_components.vpmobile24.const import DATA_PARSE_POOL, DOMAIN
+from custom_components.vpmobile24.parse_pool import (
+    async_acquire_parse_pool,
+    async_release_parse_pool,
+)
+
+
+def _stop_listeners(hass: HomeAssistant) -> int:
+    return hass.bus.async_listeners().get(EVENT_HOMEASSISTANT_STOP, 0)
+
+
+async def test_stop_listener_removed_with_the_pool(hass: HomeAssistant) -> None:
+    """Creating and releasing the pool again and again leaves no listeners behind."""
+    listeners = _stop_listeners(hass)
+
+    for _ in range(3):
+        first = async_acquire_parse_pool(hass, "entry1", 2)
+        second = async_acquire_parse_pool(hass, "entry2", 2)
+        assert first is second
+        assert _stop_listeners(hass) == listeners + 1
+
+        async_release_parse_pool(hass, "entry1")
+        assert hass.data[DOMAIN][DATA_PARSE_POOL] is first
+        async_release_parse_pool(hass, "entry2")
+        assert DATA_PARSE_POOL not in hass.data[DOMAIN]
+        assert _stop_listeners(hass) == listeners
+
+
+async def test_release_after_home_assistant_stopped(
+    hass: HomeAssistant, caplog: pytest.LogCaptureFixture
+) -> None:
+    """Releasing the pool after the stop event does not remove the listener twice."""
+    pool = async_acquire_parse_pool(hass, "entry1", 1)
+
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_STOP)
+    await hass.async_block_till_done()
+    assert pool.remove_stop_listener is None
+
+    async_release_parse_pool(hass, "entry1")
+    assert DATA_PARSE_POOL not in hass.data[DOMAIN]
+    assert "Unable to remove unknown" not in caplog.text
+
+
+async def test_pool_resized_when_the_option_changes(hass: HomeAssistant) -> None:
+    """A new size takes effect without waiting for every entry to release the pool."""
+    pool = async_acquire_parse_pool(hass, "entry1", 1)
+    assert async_acquire_parse_pool(hass, "entry2", 1) is pool
+
+    # entry2 saved parse_processes = 3 in its options
+    assert async_acquire_parse_pool(hass, "entry2", 3) is pool
+    assert pool.processes == 3
+    assert pool.users == {"entry1", "entry2"}
+
+    async_release_parse_pool(hass, "entry1")
+    async_release_parse_pool(hass, "entry2")
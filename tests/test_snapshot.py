@@ -0,0 +1,55 @@
+"""Tests for the persistent snapshot of published data."""
+from __future__ import annotations
+
+import json
+
+from custom_components.vpmobile24.api_new import Stundenplan24API
+from custom_components.vpmobile24.models import Lesson, PeriodGrid
+from custom_components.vpmobile24.snapshot import Snapshot
+
+from .conftest import SCHOOL_ID
+
+GRID = PeriodGrid({1: (450, 495), 2: (505, 550), 3: (570, 615)})
+
+
+def _snapshot() -> Snapshot:
+    lesson = Lesson(
+        "5a", "2", "", "", "", "DE", "SCH", "104", "", "", False, "102",
+        "2026-10-19", "Montag",
+    )
+    return Snapshot(
+        ["5a", None, [], []],
+        "2026-10-19",
+        {"week_lessons": [lesson], "week_changes": []},
+        {"2026-10-19": {"lessons": [lesson], "changes": []}},
+        GRID,
+    )
+
+
+def test_period_grid_survives_the_store() -> None:
+    """The grid is stored with the snapshot and rebuilt from its JSON form."""
+    stored = json.loads(json.dumps(_snapshot().as_dict()))
+
+    restored = Snapshot.from_dict(stored)
+
+    assert restored.period_grid.as_dict() == GRID.as_dict()
+    assert restored.period_grid.times(2) == (505, 550)
+    assert restored.week["week_lessons"][0].period_num == 2
+
+
+def test_snapshot_without_period_grid() -> None:
+    """Snapshots written before the grid was stored load with an empty grid."""
+    stored = json.loads(json.dumps(_snapshot().as_dict()))
+    del stored["period_grid"]
+
+    assert not Snapshot.from_dict(stored).period_grid
+
+
+def test_restored_grid_only_until_a_plan_provides_one() -> None:
+    """A stored grid fills an empty grid but never replaces a parsed one."""
+    api = Stundenplan24API(SCHOOL_ID, "snapshot", "secret")
+    api.restore_period_grid(GRID)
+    assert api.period_grid is GRID
+
+    api.restore_period_grid(PeriodGrid({1: (480, 525)}))
+    assert api.period_grid is GRID
@@ -0,0 +1,149 @@
+"""Differential test of the lxml and ElementTree backends.
+
+Every fixture plan is downloaded from a local server and parsed with both
+backends in each way the API can parse a plan: streamed on the event loop,
+whole in an executor thread, and in a worker process. All results must
+equal the plan ElementTree parses from the complete document.
+"""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Iterator
+from datetime import date
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from custom_components.vpmobile24.api_new import Stundenplan24API, parse_school_plan
+from custom_components.vpmobile24.models import SchoolPlan
+from custom_components.vpmobile24.parse_pool import ParsePool
+from custom_components.vpmobile24.transport import VpMobile24Transport
+from custom_components.vpmobile24.xml_backend import (
+    BACKEND,
+    BACKEND_ELEMENTTREE,
+    BACKEND_LXML,
+)
+
+from .conftest import SCHOOL_ID, PlanServer
+
+FIXTURES = sorted((Path(__file__).parent / "fixtures").glob("PlanKl*.xml"))
+
+BACKENDS = [
+    BACKEND_ELEMENTTREE,
+    pytest.param(
+        BACKEND_LXML,
+        marks=pytest.mark.skipif(BACKEND != BACKEND_LXML, reason="lxml is not installed"),
+    ),
+]
+
+
+def _plan_date(fixture: Path) -> date:
+    digits = fixture.stem.removeprefix("PlanKl")
+    return date(int(digits[:4]), int(digits[4:6]), int(digits[6:]))
+
+
+def _canonical(plan: SchoolPlan) -> dict[str, Any]:
+    """Return everything a plan holds as plain, comparable data."""
+    def lessons(records: list) -> list[tuple[dict[str, Any], tuple]]:
+        return [
+            (dict(lesson), (lesson.start_min, lesson.end_min, lesson.period_num))
+            for lesson in records
+        ]
+
+    return {
+        "date": plan.date,
+        "timestamp": plan.timestamp,
+        "additional_info": plan.additional_info,
+        "period_grid": plan.period_grid.as_dict(),
+        "by_class": {name: lessons(records) for name, records in plan.by_class.items()},
+        "unterricht": {name: sorted(nrs) for name, nrs in plan.unterricht.items()},
+        "courses": plan.courses,
+        "by_teacher": {name: lessons(records) for name, records in plan.by_teacher.items()},
+        "by_room": {name: lessons(records) for name, records in plan.by_room.items()},
+    }
+
+
+@pytest.fixture(scope="module")
+def parse_pool() -> Iterator[ParsePool]:
+    """One worker process shared by the tests of this module.
+
+    It is started here, so its manager thread already runs when HA's test
+    plugin records the threads a test started.
+    """
+    pool = ParsePool(1)
+    asyncio.run(pool.async_run(int, "0"))
+    yield pool
+    pool.shutdown()
+
+
+@pytest.mark.parametrize("fixture", FIXTURES, ids=lambda fixture: fixture.stem)
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("mode", ["streamed", "offloaded", "process_pool"])
+@pytest.mark.parametrize("chunked", [False, True], ids=["content_length", "chunked"])
+async def test_backends_parse_identically(
+    plan_server: PlanServer,
+    transport: VpMobile24Transport,
+    parse_pool: ParsePool,
+    fixture: Path,
+    backend: str,
+    mode: str,
+    chunked: bool,
+) -> None:
+    """Both backends produce the same plan in every parsing mode."""
+    body = fixture.read_bytes()
+    plan_date = _plan_date(fixture)
+    plan_server.plans[fixture.name] = body
+    plan_server.chunked = chunked
+    # Small pieces, so multi-byte characters and tags are split between chunks
+    plan_server.chunk_size = 64
+    api = Stundenplan24API(
+        SCHOOL_ID,
+        # Separate credentials, so no test reuses a plan parsed by another
+        f"{backend}-{mode}-{chunked}",
+        "secret",
+        base_url=plan_server.base_url,
+        transport=transport,
+        parse_offload_size=0 if mode != "streamed" else 1024 * 1024,
+        parse_pool=parse_pool if mode == "process_pool" else None,
+        xml_backend=backend,
+    )
+
+    plan = await api.async_get_school_plan(plan_date)
+
+    expected = parse_school_plan(body, plan_date, BACKEND_ELEMENTTREE)
+    assert _canonical(plan) == _canonical(expected)
+
+
+def test_fixtures_cover_the_parsed_fields() -> None:
+    """The fixtures contain what the comparison is meant to exercise."""
+    plans = {
+        fixture.name: parse_school_plan(fixture.read_bytes(), _plan_date(fixture))
+        for fixture in FIXTURES
+    }
+
+    monday = plans["PlanKl20261019.xml"]
+    assert monday.classes == ["5a", "10b", "JG11", "DaZ"]
+    assert monday.timestamp == "16.10.2026, 14:32"
+    assert [info["text"] for info in monday.additional_info] == [
+        "Heute 3. Stunde Feueralarmprobe.",
+        "Klasse 10b: Wandertag am Freitag & Elternabend.",
+    ]
+    changes = [lesson for lesson in monday.by_class["5a"] if lesson.is_change]
+    assert [lesson.info for lesson in changes] == [
+        "für Mathematik", "", "Religion fällt aus", "Klassenleiterstunde",
+    ]
+    assert "Vertretung für Herrn Müller <krank>" in [
+        lesson.info for lesson in monday.by_class["10b"]
+    ]
+    assert monday.period_grid.times(8) == (14 * 60 + 40, 15 * 60 + 25)
+
+    # ISO-8859-1 document: umlauts decoded, odd <KlSt> rows skipped
+    tuesday = plans["PlanKl20261020.xml"]
+    assert tuesday.by_class["5a"][1].info == "Deutsch fällt aus; Aufgaben über Schulportal"
+    assert tuesday.period_grid.periods == [1, 2, 3]
+    assert tuesday.unterricht["5a"] == {"101", "102", "103"}
+
+    holiday = plans["PlanKl20261026.xml"]
+    assert not holiday.classes
+    assert holiday.additional_info == [{"text": "Herbstferien", "type": "general_info"}]